@@ -1,13 +1,16 @@
 """Reasoning agent with LLM integration and automatic failover."""
 
 import os
+import re
 import json
 import logging
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, AsyncIterator
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_groq import ChatGroq
 from tenacity import retry, stop_after_attempt, wait_exponential
 
+from agents.safety_calculator import summarize_demand
+
 # Configure logger
 logger = logging.getLogger(__name__)
 
@@ -25,8 +28,9 @@ RESTOCK_PROMPT = """You are an inventory management AI agent. Analyze the follow
 - Average Daily Demand: {avg_demand:.0f} units
 - Lead Time: Lead time: {lead_time_days} days purchase, 1-2 days transfer
 
-## Demand Trend (last 7 days):
+## Demand Trend (most recent {demand_days} days, oldest first):
 {demand_history}
+- Full history: {demand_stats[count]} days, min {demand_stats[min]:.0f}, max {demand_stats[max]:.0f}, mean {demand_stats[mean]:.0f}, median {demand_stats[median]:.0f}
 
 ## Decision Rules:
 1. **Use "transfer"** if:
@@ -53,6 +57,82 @@ RESTOCK_PROMPT = """You are an inventory management AI agent. Analyze the follow
 }}
 """
 
+# Decision fields of the response JSON, matched in a partially streamed
+# response. A bare number only counts once a delimiter follows it (so "0.8"
+# isn't taken from a half-received "0.85"); a quoted one once it's closed.
+_NUMBER_VALUE = r"""(?:["'](-?\d+(?:\.\d+)?)["']|(-?\d+(?:\.\d+)?)\s*[,}\n])"""
+_DECISION_PATTERNS = {
+    "action": re.compile(r"""["']action["']\s*:\s*["'](restock|transfer)["']"""),
+    "quantity": re.compile(r"""["']quantity["']\s*:\s*""" + _NUMBER_VALUE),
+    "confidence": re.compile(r"""["']confidence["']\s*:\s*""" + _NUMBER_VALUE)
+}
+
+
+def _matched_number(match: "re.Match") -> float:
+    """Number captured by a _NUMBER_VALUE match (quoted or bare)."""
+    return float(match.group(1) or match.group(2))
+
+
+def parse_partial_decision(buffer: str) -> Optional[Dict[str, Any]]:
+    """
+    Extract action/quantity/confidence from a partially received response.
+    
+    Args:
+        buffer: Response text received so far
+        
+    Returns:
+        Dict with the three decision fields, or None until all are complete
+    """
+    matches = {field: pattern.search(buffer) for field, pattern in _DECISION_PATTERNS.items()}
+    if not all(matches.values()):
+        return None
+    
+    quantity = _matched_number(matches["quantity"])
+    return {
+        "action": matches["action"].group(1),
+        "quantity": int(quantity) if quantity.is_integer() else quantity,
+        "confidence": _matched_number(matches["confidence"])
+    }
+
+
+def _sanitize_product_id(product_id: str) -> str:
+    """
+    Sanitize product ID to prevent prompt injection.
+    
+    Allows only alphanumeric characters, underscores, and dashes.
+    Truncates to reasonable length.
+    """
+    sanitized = re.sub(r'[^A-Za-z0-9_-]', '', product_id)
+    return sanitized[:100]  # Max 100 chars
+
+
+def build_restock_prompt(context: Dict[str, Any]) -> str:
+    """
+    Render RESTOCK_PROMPT for an inventory context.
+    
+    Args:
+        context: Dictionary with inventory parameters; demand_history may be
+            replaced by precomputed demand_history_tail/demand_stats
+            
+    Returns:
+        Prompt with a sanitized product_id and a bounded demand history
+    """
+    # Sanitize product_id to prevent prompt injection
+    safe_context = context.copy()
+    if "product_id" in safe_context:
+        safe_context["product_id"] = _sanitize_product_id(safe_context["product_id"])
+    
+    # Bound prompt size: recent demand points plus full-history stats
+    # (callers may pass them precomputed as demand_history_tail/demand_stats)
+    if "demand_history_tail" not in safe_context:
+        safe_context["demand_history_tail"], safe_context["demand_stats"] = summarize_demand(
+            safe_context["demand_history"]
+        )
+    safe_context["demand_history"] = safe_context.pop("demand_history_tail")
+    safe_context["demand_days"] = len(safe_context["demand_history"])
+    
+    return RESTOCK_PROMPT.format(**safe_context)
+
 
 class LLMProvider:
     """LLM Provider with automatic failover support."""
@@ -189,18 +269,6 @@ class ReasoningAgent:
             logger.warning(f"LLM call failed ({llm_name}): {str(e)}", exc_info=True)
             return None
     
-    
-    def _sanitize_product_id(self, product_id: str) -> str:
-        """
-        Sanitize product ID to prevent prompt injection.
-        
-        Allows only alphanumeric characters, underscores, and dashes.
-        Truncates to reasonable length.
-        """
-        import re
-        sanitized = re.sub(r'[^A-Za-z0-9_-]', '', product_id)
-        return sanitized[:100]  # Max 100 chars
-    
     @retry(stop=stop_after_attempt(2), wait=wait_exponential(multiplier=1, min=1, max=5))
     async def analyze(self, context: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -218,12 +286,7 @@ class ReasoningAgent:
             ValueError: If no LLM providers configured
             RuntimeError: If all LLM providers fail
         """
-        # Sanitize product_id to prevent prompt injection
-        safe_context = context.copy()
-        if "product_id" in safe_context:
-            safe_context["product_id"] = self._sanitize_product_id(safe_context["product_id"])
-        
-        prompt = RESTOCK_PROMPT.format(**safe_context)
+        prompt = build_restock_prompt(context)
         llm_chain = self.llm_provider.get_llm_chain()
         
         if not llm_chain:
@@ -240,6 +303,57 @@ class ReasoningAgent:
         
         # All LLMs failed
         raise RuntimeError(f"All LLM providers failed. Last error: {last_error}")
+    
+    async def analyze_stream(self, context: Dict[str, Any]) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Analyze inventory context, streaming the LLM response.
+        
+        Yields a partial recommendation (action, quantity, confidence and
+        "_partial": True) as soon as those fields have streamed in, then the
+        full recommendation once the response is complete. If a provider
+        fails mid-stream the next one is tried, so a second partial may
+        follow; the final recommendation is the authoritative one.
+        
+        Args:
+            context: Dictionary with inventory parameters
+            
+        Yields:
+            Partial recommendation dict(s), then the complete one
+            
+        Raises:
+            ValueError: If no LLM providers configured
+            RuntimeError: If all LLM providers fail
+        """
+        prompt = build_restock_prompt(context)
+        llm_chain = self.llm_provider.get_llm_chain()
+        
+        if not llm_chain:
+            raise ValueError("No LLM providers configured. Check GOOGLE_API_KEY/GEMINI_API_KEY or GROQ_API_KEY.")
+        
+        last_error = None
+        for llm_name, llm in llm_chain:
+            try:
+                logger.info(f"Streaming LLM: {llm_name}")
+                buffer = ""
+                decision = None
+                async for chunk in llm.astream(prompt):
+                    buffer += chunk.content
+                    if decision is None:
+                        decision = parse_partial_decision(buffer)
+                        if decision is not None:
+                            yield {**decision, "_partial": True, "_llm_provider": llm_name}
+                
+                result = self._parse_json_response(buffer)
+                result["_llm_provider"] = llm_name
+                logger.info(f"LLM stream successful: {llm_name}")
+                yield result
+                return
+            except Exception as e:
+                logger.warning(f"LLM stream failed ({llm_name}): {str(e)}", exc_info=True)
+                last_error = f"{llm_name} failed"
+        
+        # All LLMs failed
+        raise RuntimeError(f"All LLM providers failed. Last error: {last_error}")
 
 
 # --- Standalone functions for testing ---
@@ -251,7 +365,7 @@ async def analyze_with_gemini(context: Dict[str, Any]) -> Dict[str, Any]:
         google_api_key=os.getenv("GOOGLE_API_KEY") or os.getenv("GEMINI_API_KEY"),
         temperature=0.3
     )
-    prompt = RESTOCK_PROMPT.format(**context)
+    prompt = build_restock_prompt(context)
     response = await llm.ainvoke(prompt)
     content = response.content
     start = content.find("{")
@@ -266,7 +380,7 @@ async def analyze_with_groq(context: Dict[str, Any]) -> Dict[str, Any]:
         groq_api_key=os.getenv("GROQ_API_KEY"),
         temperature=0.3
     )
-    prompt = RESTOCK_PROMPT.format(**context)
+    prompt = build_restock_prompt(context)
     response = await llm.ainvoke(prompt)
     content = response.content
     start = content.find("{")
@@ -2,8 +2,45 @@
 
 import math
 import numpy as np
-from scipy.stats import norm
-from typing import Tuple
+from functools import lru_cache
+from typing import Tuple, Dict, List
+
+# Most recent demand points shown to the LLM (the rest is summarized)
+DEMAND_TAIL_SIZE = 30
+
+
+# Z-scores (inverse normal CDF) for the common service levels, so the usual
+# case needs neither scipy nor a ppf evaluation
+_Z_TABLE = {
+    0.80: 0.8416212335729143,
+    0.85: 1.0364333894937898,
+    0.90: 1.2815515655446004,
+    0.95: 1.6448536269514722,
+    0.975: 1.959963984540054,
+    0.98: 2.0537489106318225,
+    0.99: 2.3263478740408408
+}
+
+
+@lru_cache(maxsize=128)
+def _norm_ppf(service_level: float) -> float:
+    """Inverse normal CDF via scipy (imported on first use), cached per level."""
+    from scipy.stats import norm
+    return float(norm.ppf(service_level))
+
+
+def z_score_for(service_level: float) -> float:
+    """
+    Z-score for a service level (inverse normal CDF).
+    
+    Args:
+        service_level: Target service level, e.g. 0.95
+    
+    Returns:
+        Z-score (1.645 for 95%, 2.326 for 99%)
+    """
+    z = _Z_TABLE.get(service_level)
+    return z if z is not None else _norm_ppf(service_level)
 
 
 def calculate_safety_stock(std_dev: float, lead_time: int, service_level: float = 0.95) -> float:
@@ -34,7 +71,7 @@ def calculate_safety_stock(std_dev: float, lead_time: int, service_level: float
         raise ValueError("Service level must be between 0.5 and 0.99")
     
     # Calculate Z-score from service level using inverse CDF
-    z = norm.ppf(service_level)  # 1.65 for 95%, 2.33 for 99%
+    z = z_score_for(service_level)  # 1.65 for 95%, 2.33 for 99%
     
     return z * std_dev * math.sqrt(lead_time)
 
@@ -128,12 +165,101 @@ def process_inventory_data(
     if len(demand_history) < 3:
         raise ValueError("demand_history must have at least 3 data points")
     
-    # Calculate statistics
-    avg_demand = np.mean(demand_history)
-    std_dev = np.std(demand_history, ddof=1)  # Sample standard deviation
+    # Calculate statistics (convert the list to an array once, not per statistic)
+    demand = np.asarray(demand_history, dtype=np.float64)
+    avg_demand = demand.mean()
+    std_dev = demand.std(ddof=1)  # Sample standard deviation
     
     # Calculate safety parameters
     safety_stock = calculate_safety_stock(std_dev, lead_time, service_level)
     reorder_point = calculate_reorder_point(avg_demand, lead_time, safety_stock)
     
     return avg_demand, std_dev, safety_stock, reorder_point
+
+
+def summarize_demand(
+    demand_history: list,
+    tail_size: int = DEMAND_TAIL_SIZE
+) -> Tuple[List[float], Dict[str, float]]:
+    """
+    Bound a demand series for the LLM prompt: recent points plus summary stats.
+    
+    Args:
+        demand_history: List of historical demand values
+        tail_size: Number of most recent points to keep
+    
+    Returns:
+        Tuple of (last tail_size values, stats dict with count/min/max/mean/median
+        over the full history)
+    
+    Example:
+        >>> tail, stats = summarize_demand(list(range(100)), tail_size=3)
+        >>> tail, stats["median"]
+        ([97, 98, 99], 49.5)
+    """
+    demand = np.asarray(demand_history)  # keeps integer series as ints in the tail
+    if demand.size == 0:
+        raise ValueError("demand_history must not be empty")
+    
+    stats = {
+        "count": int(demand.size),
+        "min": float(demand.min()),
+        "max": float(demand.max()),
+        "mean": float(demand.mean()),
+        "median": float(np.median(demand))
+    }
+    return demand[-tail_size:].tolist(), stats
+
+
+def batch_process_inventory(
+    demand_matrix: np.ndarray,
+    lead_times: np.ndarray,
+    service_levels: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Vectorized process_inventory_data over many products at once.
+    
+    Each row of demand_matrix is one product's demand history; all rows must
+    share the same length. Statistics are computed along the product axis in
+    a single NumPy pass instead of one Python call per product.
+    
+    Args:
+        demand_matrix: 2-D array of shape (n_products, n_days), n_days >= 3
+        lead_times: Lead time in days per product, shape (n_products,)
+        service_levels: Target service level per product (0.5 to 0.99)
+    
+    Returns:
+        Tuple of arrays (avg_demand, std_dev, safety_stock, reorder_point),
+        each of shape (n_products,)
+    
+    Raises:
+        ValueError: On shape mismatch or out-of-range inputs
+    
+    Example:
+        >>> demand = np.array([[100, 120, 110], [50, 55, 60]])
+        >>> avg, std, ss, rop = batch_process_inventory(demand, [7, 5], [0.95, 0.99])
+    """
+    demand_matrix = np.asarray(demand_matrix, dtype=np.float64)
+    lead_times = np.asarray(lead_times, dtype=np.float64)
+    service_levels = np.asarray(service_levels, dtype=np.float64)
+    
+    if demand_matrix.ndim != 2:
+        raise ValueError("demand_matrix must be 2-D (n_products, n_days)")
+    if demand_matrix.shape[1] < 3:
+        raise ValueError("demand_history must have at least 3 data points")
+    if lead_times.shape != (demand_matrix.shape[0],) or service_levels.shape != lead_times.shape:
+        raise ValueError("lead_times and service_levels must have one entry per product")
+    if np.any(lead_times <= 0):
+        raise ValueError("Lead time must be positive")
+    if np.any((service_levels < 0.5) | (service_levels > 0.99)):
+        raise ValueError("Service level must be between 0.5 and 0.99")
+    
+    avg_demand = demand_matrix.mean(axis=1)
+    std_dev = demand_matrix.std(axis=1, ddof=1)  # Sample standard deviation
+    
+    from scipy.stats import norm
+    z = norm.ppf(service_levels)
+    safety_stock = z * std_dev * np.sqrt(lead_times)
+    reorder_point = avg_demand * lead_times + safety_stock
+    
+    return avg_demand, std_dev, safety_stock, reorder_point
@@ -30,7 +30,9 @@ from dotenv import load_dotenv
 from slowapi import _rate_limit_exceeded_handler
 from slowapi.errors import RateLimitExceeded
 import numpy as np
-from scipy.stats import norm
+
+# Load environment variables (before local modules read config at import time)
+load_dotenv()
 
 from models.schemas import (
     InventoryRequest, 
@@ -42,14 +44,15 @@ from models.schemas import (
     OrderListResponse
 )
 from agents.data_loader import load_data
-from agents.safety_calculator import process_inventory_data
+from agents.safety_calculator import process_inventory_data, z_score_for
 from agents.reasoning_agent import ReasoningAgent
 from agents.action_agent import generate_action
 from utils.logging import setup_logging, get_logger
 from utils import metrics
 from utils.rate_limiter import limiter, rate_limit_exceeded_handler, RATE_LIMITS
+from utils import notifications, telegram
 from utils.notifications import send_slack_notification, send_webhook_callback
-from utils.telegram import send_telegram_notification, send_telegram_low_confidence_alert
+from utils.telegram import schedule_telegram_notification, schedule_telegram_low_confidence_alert
 from utils.database import (
     init_database, 
     save_order, 
@@ -57,12 +60,12 @@ from utils.database import (
     get_order_by_id,
     update_order_status,
     log_audit_event,
-    get_dashboard_stats
+    get_dashboard_stats,
+    start_audit_writer,
+    stop_audit_writer
 )
 from utils.mongodb import connect_mongodb, close_mongodb
-
-# Load environment variables
-load_dotenv()
+from utils.serialization import ORJSONResponse, loads
 
 # Setup logging
 setup_logging()
@@ -75,12 +78,23 @@ async def lifespan(app: FastAPI):
     # Startup
     logger.info("Initializing databases...")
     await init_database()  # SQLite fallback
+    start_audit_writer()  # Batched audit log writes
     await connect_mongodb()  # MongoDB Atlas (if configured)
+    await notifications.init_http()  # Pooled clients for Slack/webhooks
+    await telegram.init_http()  # and the Telegram Bot API
+    if LANGGRAPH_AVAILABLE:
+        await open_checkpointer()  # Workflow checkpoints (if configured)
     logger.info("Application startup complete")
     yield
     # Shutdown
     logger.info("Application shutdown")
+    await stop_audit_writer()
+    await telegram.drain_pending()  # Let in-flight alerts finish
+    await notifications.close_http()
+    await telegram.close_http()
     await close_mongodb()
+    if LANGGRAPH_AVAILABLE:
+        await close_checkpointer()
 
 
 # Initialize FastAPI app
@@ -99,6 +113,9 @@ app.add_exception_handler(RateLimitExceeded, rate_limit_exceeded_handler)
 CONFIDENCE_THRESHOLD = float(os.getenv("AUTO_EXECUTE_THRESHOLD", "0.95"))
 logger.info(f"Auto-execute confidence threshold: {CONFIDENCE_THRESHOLD}")
 
+# Products analyzed at once per batch request (bounds concurrent LLM calls)
+BATCH_MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", "10"))
+
 # Mount static files for dashboard
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
@@ -111,7 +128,8 @@ SESSION_TOKENS: Dict[str, str] = {}
 
 # Import LangGraph workflow
 try:
-    from workflow.graph import run_inventory_analysis
+    from workflow.graph import get_agent, open_checkpointer, close_checkpointer
+    get_agent()  # Compile the graph now rather than on the first request
     LANGGRAPH_AVAILABLE = True
     logger.info("LangGraph workflow initialized successfully")
 except ImportError as e:
@@ -327,7 +345,7 @@ async def verify_calculation(
         # Step-by-step calculations
         avg_demand = float(np.mean(demand))
         std_dev = float(np.std(demand, ddof=1))
-        z_score = float(norm.ppf(service_level))
+        z_score = z_score_for(service_level)
         
         # Safety Stock = Z × σ × √L
         safety_stock = z_score * std_dev * np.sqrt(lead_time)
@@ -429,7 +447,7 @@ async def telegram_webhook(request: Request):
     from utils.telegram import handle_telegram_update
     
     try:
-        update = await request.json()
+        update = loads(await request.body())
         logger.info("Received Telegram update", update_id=update.get("update_id"))
         result = await handle_telegram_update(update)
         return {"ok": True, "result": result}
@@ -594,10 +612,10 @@ async def inventory_trigger(
             # Send Slack notification for low-confidence orders
             await send_slack_notification(order_data)
             # Send Telegram alert for low-confidence orders requiring review
-            asyncio.create_task(send_telegram_low_confidence_alert(order_data))
+            schedule_telegram_low_confidence_alert(order_data)
         else:
             # Send Telegram notification for executed orders
-            asyncio.create_task(send_telegram_notification(order_data))
+            schedule_telegram_notification(order_data)
         
         # Send webhook callback if provided
         if inventory_request.callback_url:
@@ -666,6 +684,8 @@ async def inventory_trigger_batch(
     try:
         logger.info(f"Batch processing {len(batch_request.products)} products")
         
+        semaphore = asyncio.Semaphore(BATCH_MAX_CONCURRENCY)
+        
         async def process_single(product_id: str) -> Dict[str, Any]:
             """Process a single product and return result."""
             try:
@@ -673,7 +693,8 @@ async def inventory_trigger_batch(
                     product_id=product_id,
                     mode=batch_request.mode
                 )
-                result = await inventory_trigger(request, req, api_key)
+                async with semaphore:
+                    result = await inventory_trigger(request, req, api_key)
                 return {
                     "product_id": product_id,
                     "success": True,
@@ -686,7 +707,7 @@ async def inventory_trigger_batch(
                     "error": str(e)
                 }
         
-        # Process all products in parallel
+        # Process all products in parallel (at most BATCH_MAX_CONCURRENCY at once)
         tasks = [process_single(pid) for pid in batch_request.products]
         results = await asyncio.gather(*tasks)
         
@@ -736,7 +757,8 @@ async def get_order(
     order = await get_order_by_id(order_id)
     if not order:
         raise HTTPException(status_code=404, detail="Order not found")
-    return order
+    # Returned as a Response so FastAPI skips its jsonable_encoder pass
+    return ORJSONResponse(order)
 
 
 @app.post("/orders/{order_id}/approve")
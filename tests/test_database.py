@@ -0,0 +1,226 @@
+"""Tests for SQLite order persistence (schema, migration, order_stats)."""
+
+import aiosqlite
+import pytest
+
+from utils import database
+
+
+# orders table as created by earlier releases (rowid-keyed, no STRICT)
+LEGACY_ORDERS_DDL = """
+    CREATE TABLE orders (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        order_id TEXT UNIQUE NOT NULL,
+        product_id TEXT NOT NULL,
+        action TEXT NOT NULL,
+        quantity INTEGER NOT NULL,
+        confidence REAL,
+        status TEXT DEFAULT 'pending',
+        llm_provider TEXT,
+        reasoning TEXT,
+        safety_stock REAL,
+        reorder_point REAL,
+        current_stock REAL,
+        shortage REAL,
+        estimated_cost REAL,
+        supplier_id TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        executed_at TIMESTAMP,
+        approved_by TEXT,
+        approved_at TIMESTAMP
+    )
+"""
+
+
+def make_order(order_id, **overrides):
+    """Build a minimal order dict for save_order."""
+    order = {
+        "order_id": order_id,
+        "product_id": "STEEL_SHEETS",
+        "action": "restock",
+        "quantity": 100,
+        "confidence": 0.9,
+        "status": "pending"
+    }
+    order.update(overrides)
+    return order
+
+
+@pytest.fixture
+def db_path(tmp_path, monkeypatch):
+    """Point the database module at a fresh temporary file."""
+    path = tmp_path / "inventory.db"
+    monkeypatch.setattr(database, "DB_PATH", path)
+    return path
+
+
+async def table_sql(path, name):
+    """Return the CREATE statement of a table (None if it doesn't exist)."""
+    async with aiosqlite.connect(path) as db:
+        async with db.execute(
+            "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?", (name,)
+        ) as cursor:
+            row = await cursor.fetchone()
+            return row[0] if row else None
+
+
+class TestSchema:
+    """Test database initialization and legacy migration."""
+
+    @pytest.mark.asyncio
+    async def test_init_is_idempotent(self, db_path):
+        """Test running init_database twice keeps orders and stats."""
+        await database.init_database()
+        assert await database.save_order(make_order("PO-1"))
+
+        await database.init_database()
+
+        assert len(await database.get_orders()) == 1
+        stats = await database.get_dashboard_stats()
+        assert stats["total_orders"] == 1
+
+    @pytest.mark.asyncio
+    async def test_migrates_legacy_orders_table(self, db_path):
+        """Test a legacy table is rebuilt with its rows preserved."""
+        async with aiosqlite.connect(db_path) as db:
+            await db.execute(LEGACY_ORDERS_DDL)
+            await db.executemany(
+                "INSERT INTO orders (order_id, product_id, action, quantity, confidence, status) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    ("PO-1", "STEEL_SHEETS", "restock", 100, 0.9, "executed"),
+                    ("PO-2", "COPPER_WIRE", "transfer", 10.5, None, None)
+                ]
+            )
+            await db.commit()
+
+        await database.init_database()
+
+        assert "WITHOUT ROWID" in await table_sql(db_path, "orders")
+        assert await table_sql(db_path, "orders_legacy") is None
+
+        orders = {o["order_id"]: o for o in await database.get_orders()}
+        assert orders["PO-1"]["quantity"] == 100
+        assert orders["PO-1"]["status"] == "executed"
+        assert orders["PO-2"]["quantity"] == 11  # rounded to whole units
+        assert orders["PO-2"]["status"] == "pending"
+
+        stats = await database.get_dashboard_stats()
+        assert stats["total_orders"] == 2
+        assert stats["average_confidence"] == 0.9
+
+    @pytest.mark.asyncio
+    async def test_failed_migration_keeps_legacy_table(self, db_path):
+        """Test startup survives a legacy row the new schema rejects."""
+        async with aiosqlite.connect(db_path) as db:
+            await db.execute(LEGACY_ORDERS_DDL)
+            await db.execute(
+                "INSERT INTO orders (order_id, product_id, action, quantity, confidence) "
+                "VALUES ('PO-1', 'STEEL_SHEETS', 'restock', 100, 'high')"
+            )
+            await db.commit()
+
+        await database.init_database()
+
+        assert "AUTOINCREMENT" in await table_sql(db_path, "orders")
+        assert await database.save_order(make_order("PO-2"))
+        assert len(await database.get_orders()) == 2
+
+
+class TestSaveOrder:
+    """Test order inserts against the STRICT table."""
+
+    @pytest.mark.asyncio
+    async def test_fractional_quantity_is_rounded(self, db_path):
+        """Test an LLM quantity like 10.5 is stored as whole units."""
+        await database.init_database()
+
+        assert await database.save_order(make_order("PO-1", quantity=10.5))
+
+        order = await database.get_order_by_id("PO-1")
+        assert order["quantity"] == 11
+
+    @pytest.mark.asyncio
+    async def test_product_totals_match_stored_quantities(self, db_path):
+        """Test the product cache adds the same rounded quantity as the order."""
+        await database.init_database()
+
+        await database.save_order(make_order("PO-1", quantity=10.5))
+        await database.save_order(make_order("PO-2", quantity=2.4))
+
+        async with aiosqlite.connect(db_path) as db:
+            async with db.execute("""
+                SELECT p.total_quantity_ordered, SUM(o.quantity)
+                FROM products p JOIN orders o USING (product_id)
+                WHERE product_id = 'STEEL_SHEETS'
+            """) as cursor:
+                total, stored = await cursor.fetchone()
+        assert total == stored == 13
+
+    @pytest.mark.asyncio
+    async def test_null_status_defaults_to_pending(self, db_path):
+        """Test an explicit None status is stored as pending."""
+        await database.init_database()
+
+        assert await database.save_order(make_order("PO-1", status=None))
+
+        order = await database.get_order_by_id("PO-1")
+        assert order["status"] == "pending"
+
+
+class TestOrderStats:
+    """Test the trigger-maintained dashboard aggregates."""
+
+    @pytest.mark.asyncio
+    async def test_stats_track_inserts_and_deletes(self, db_path):
+        """Test totals and average confidence follow inserts and deletes."""
+        await database.init_database()
+        await database.save_order(make_order("PO-1", confidence=0.8))
+        await database.save_order(make_order("PO-2", confidence=0.6))
+        await database.save_order(make_order("PO-3", confidence=None))
+
+        stats = await database.get_dashboard_stats()
+        assert stats["total_orders"] == 3
+        assert stats["average_confidence"] == 0.7  # NULL confidence ignored
+
+        async with aiosqlite.connect(db_path) as db:
+            await db.execute("DELETE FROM orders WHERE order_id IN ('PO-1', 'PO-3')")
+            await db.commit()
+
+        stats = await database.get_dashboard_stats()
+        assert stats["total_orders"] == 1
+        assert stats["average_confidence"] == 0.6
+
+    @pytest.mark.asyncio
+    async def test_stats_empty_after_deleting_all(self, db_path):
+        """Test average confidence falls back to 0 with no orders."""
+        await database.init_database()
+        await database.save_order(make_order("PO-1"))
+
+        async with aiosqlite.connect(db_path) as db:
+            await db.execute("DELETE FROM orders")
+            await db.commit()
+
+        stats = await database.get_dashboard_stats()
+        assert stats["total_orders"] == 0
+        assert stats["average_confidence"] == 0
+
+
+class TestIterOrders:
+    """Test streaming order reads."""
+
+    @pytest.mark.asyncio
+    async def test_iter_orders_matches_get_orders(self, db_path):
+        """Test iter_orders yields the same rows across fetch batches."""
+        await database.init_database()
+        for i in range(5):
+            await database.save_order(make_order(f"PO-{i}", status="executed" if i % 2 else "pending"))
+
+        streamed = [o async for o in database.iter_orders(limit=10, batch_size=2)]
+        assert streamed == await database.get_orders(limit=10)
+
+        pending = [o async for o in database.iter_orders(status="pending", batch_size=2)]
+        assert {o["order_id"] for o in pending} == {"PO-0", "PO-2", "PO-4"}
+
+        limited = [o async for o in database.iter_orders(limit=3, batch_size=2)]
+        assert len(limited) == 3
@@ -0,0 +1,123 @@
+"""Tests for streamed LLM response parsing in the reasoning agent."""
+
+import pytest
+from types import SimpleNamespace
+
+from agents.reasoning_agent import ReasoningAgent, parse_partial_decision
+
+
+class FakeStreamingLLM:
+    """Stands in for a LangChain chat model, streaming fixed chunks."""
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+
+    async def astream(self, prompt):
+        for chunk in self.chunks:
+            yield SimpleNamespace(content=chunk)
+
+
+CONTEXT = {
+    "product_id": "STEEL_SHEETS",
+    "current_stock": 150,
+    "warehouse_b_stock": 600,
+    "safety_stock": 108,
+    "reorder_point": 1154,
+    "shortage": 1004,
+    "avg_demand": 149,
+    "std_dev": 25,
+    "lead_time_days": 7,
+    "demand_history": [100, 120, 110, 130, 125]
+}
+
+
+class TestParsePartialDecision:
+    """Test extracting the decision fields from a partial response."""
+
+    def test_complete_fields(self):
+        """Test all three fields parse once delimited."""
+        buffer = '{"action": "restock", "quantity": 2000, "confidence": 0.92, "reasoning": "Sto'
+
+        assert parse_partial_decision(buffer) == {
+            "action": "restock",
+            "quantity": 2000,
+            "confidence": 0.92
+        }
+
+    def test_half_received_number(self):
+        """Test a number without a following delimiter is not trusted yet."""
+        buffer = '{"action": "restock", "quantity": 2000, "confidence": 0.8'
+
+        assert parse_partial_decision(buffer) is None
+        assert parse_partial_decision(buffer + "5,")["confidence"] == 0.85
+
+    def test_fields_in_any_order(self):
+        """Test fields are found regardless of their order in the object."""
+        buffer = '{"reasoning": "B has surplus", "confidence": 0.7,\n"quantity": 450, "action": "transfer"'
+
+        assert parse_partial_decision(buffer) == {
+            "action": "transfer",
+            "quantity": 450,
+            "confidence": 0.7
+        }
+
+    def test_single_quotes(self):
+        """Test single-quoted keys and values are accepted."""
+        buffer = "{'action': 'transfer', 'quantity': 300, 'confidence': 0.75}"
+
+        assert parse_partial_decision(buffer) == {
+            "action": "transfer",
+            "quantity": 300,
+            "confidence": 0.75
+        }
+
+    def test_quantity_as_string(self):
+        """Test a quoted number counts once its closing quote arrives."""
+        buffer = '{"action": "restock", "quantity": "120'
+
+        assert parse_partial_decision(buffer + '0", "confidence": 0.9') is None
+        assert parse_partial_decision(buffer + '0", "confidence": 0.9,')["quantity"] == 1200
+
+    def test_stream_that_never_completes(self):
+        """Test no prefix of a truncated response yields a decision."""
+        response = '{"action": "restock", "quantity": 2000, "confidence": 0.9'
+
+        for end in range(len(response) + 1):
+            assert parse_partial_decision(response[:end]) is None
+
+
+class TestAnalyzeStream:
+    """Test streaming analysis with provider failover."""
+
+    @pytest.mark.asyncio
+    async def test_partial_then_final(self):
+        """Test the decision is yielded before the complete recommendation."""
+        agent = ReasoningAgent()
+        llm = FakeStreamingLLM([
+            '{"action": "transfer", "quantity": 450, ',
+            '"confidence": 0.85, "reasoning": "Warehouse B ',
+            'has surplus"}'
+        ])
+        agent.llm_provider.get_llm_chain = lambda: [("groq", llm)]
+
+        results = [r async for r in agent.analyze_stream(CONTEXT)]
+
+        assert len(results) == 2
+        assert results[0]["_partial"] is True
+        assert results[0]["quantity"] == 450
+        assert results[1]["reasoning"] == "Warehouse B has surplus"
+        assert "_partial" not in results[1]
+
+    @pytest.mark.asyncio
+    async def test_truncated_stream_raises(self):
+        """Test a stream cut off mid-response fails after its partial."""
+        agent = ReasoningAgent()
+        llm = FakeStreamingLLM(['{"action": "restock", "quantity": 2000, "confidence": 0.9, "reas'])
+        agent.llm_provider.get_llm_chain = lambda: [("groq", llm)]
+
+        results = []
+        with pytest.raises(RuntimeError, match="All LLM providers failed"):
+            async for result in agent.analyze_stream(CONTEXT):
+                results.append(result)
+
+        assert [r["_partial"] for r in results] == [True]
@@ -6,7 +6,9 @@ from agents.safety_calculator import (
     calculate_safety_stock,
     calculate_reorder_point,
     calculate_eoq,
-    process_inventory_data
+    process_inventory_data,
+    batch_process_inventory,
+    summarize_demand
 )
 
 
@@ -137,3 +139,54 @@ class TestEdgeCases:
         """Test with 1-day lead time."""
         ss = calculate_safety_stock(std_dev=20, lead_time=1, service_level=0.95)
         assert 30 < ss < 35  # 1.65 × 20 × √1 = 33
+
+
+class TestBatchProcessInventory:
+    """Test vectorized multi-product processing."""
+    
+    def test_matches_scalar_pipeline(self):
+        """Test batch results equal per-product process_inventory_data."""
+        demand = np.array([
+            [100, 120, 110, 130, 125, 115, 140],
+            [50, 150, 75, 125, 100, 80, 120],
+            [100, 100, 100, 100, 100, 100, 100],
+        ])
+        lead_times = [7, 3, 12]
+        service_levels = [0.95, 0.99, 0.9]
+        
+        batch = batch_process_inventory(demand, lead_times, service_levels)
+        
+        for i in range(len(demand)):
+            expected = process_inventory_data(list(demand[i]), lead_times[i], service_levels[i])
+            for got, want in zip(batch, expected):
+                assert got[i] == pytest.approx(want)
+    
+    def test_batch_validation(self):
+        """Test input validation."""
+        with pytest.raises(ValueError):
+            batch_process_inventory(np.array([[100, 120]]), [7], [0.95])  # Too few points
+        with pytest.raises(ValueError):
+            batch_process_inventory(np.array([[100, 120, 110]]), [7, 3], [0.95])  # Shape mismatch
+        with pytest.raises(ValueError):
+            batch_process_inventory(np.array([[100, 120, 110]]), [0], [0.95])
+
+
+class TestSummarizeDemand:
+    """Test the bounded demand summary used for LLM prompts."""
+    
+    def test_tail_and_full_history_stats(self):
+        """Tail keeps the most recent points; stats cover the whole series."""
+        demand = list(range(100))
+        tail, stats = summarize_demand(demand, tail_size=30)
+        
+        assert tail == list(range(70, 100))
+        assert stats["count"] == 100
+        assert stats["min"] == 0 and stats["max"] == 99
+        assert stats["mean"] == pytest.approx(49.5)
+        assert stats["median"] == pytest.approx(49.5)
+    
+    def test_short_history_kept_whole(self):
+        """Series shorter than the tail size are passed through unchanged."""
+        tail, stats = summarize_demand([100, 120, 110])
+        assert tail == [100, 120, 110]
+        assert stats["count"] == 3
@@ -1,17 +1,179 @@
 """Database utilities for order persistence and audit logging."""
 
 import os
+import math
+import asyncio
 import aiosqlite
 import logging
+from operator import itemgetter
 from datetime import datetime
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple, AsyncIterator
 from pathlib import Path
 
+from utils import metrics
+
 logger = logging.getLogger(__name__)
 
 # Database path
 DB_PATH = Path(__file__).parent.parent / "data" / "inventory.db"
 
+# Rows pulled per fetchmany() call when streaming orders
+ORDERS_FETCH_BATCH_SIZE = 1000
+
+# Column order for the orders INSERT (executed_at is appended separately)
+_ORDER_FIELDS = (
+    "order_id", "product_id", "action", "quantity", "confidence",
+    "status", "llm_provider", "reasoning", "safety_stock",
+    "reorder_point", "current_stock", "shortage", "estimated_cost"
+)
+_ORDER_DEFAULTS: Dict[str, Any] = {**dict.fromkeys(_ORDER_FIELDS), "status": "pending"}
+_order_values = itemgetter(*_ORDER_FIELDS)
+
+# Audit log write-behind queue (drained by a background task)
+AUDIT_QUEUE_MAXSIZE = 10000
+AUDIT_FLUSH_INTERVAL = 0.05  # seconds
+AUDIT_BATCH_SIZE = 500
+_audit_queue: "asyncio.Queue[Tuple[Any, ...]]" = asyncio.Queue(maxsize=AUDIT_QUEUE_MAXSIZE)
+_audit_writer: Optional[asyncio.Task] = None
+
+
+# Orders are keyed by their natural order_id: no rowid B-tree alongside it.
+# STRICT tables only accept INTEGER/REAL/TEXT/BLOB/ANY, so timestamps are TEXT.
+_ORDERS_TABLE_DDL = """
+    CREATE TABLE IF NOT EXISTS orders (
+        order_id TEXT PRIMARY KEY,
+        product_id TEXT NOT NULL,
+        action TEXT NOT NULL,
+        quantity INTEGER NOT NULL,
+        confidence REAL,
+        status TEXT NOT NULL DEFAULT 'pending',
+        llm_provider TEXT,
+        reasoning TEXT,
+        safety_stock REAL,
+        reorder_point REAL,
+        current_stock REAL,
+        shortage REAL,
+        estimated_cost REAL,
+        supplier_id TEXT,
+        created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+        executed_at TEXT,
+        approved_by TEXT,
+        approved_at TEXT
+    ) WITHOUT ROWID, STRICT;
+"""
+
+_ORDERS_COLUMNS = (
+    "order_id, product_id, action, quantity, confidence, status, llm_provider, "
+    "reasoning, safety_stock, reorder_point, current_stock, shortage, "
+    "estimated_cost, supplier_id, created_at, executed_at, approved_by, approved_at"
+)
+
+# Full schema, run as one script in a single transaction
+_SCHEMA_DDL = f"""
+BEGIN IMMEDIATE;
+
+{_ORDERS_TABLE_DDL}
+
+CREATE INDEX IF NOT EXISTS idx_orders_created_at ON orders (created_at);
+CREATE INDEX IF NOT EXISTS idx_orders_status_created_at ON orders (status, created_at);
+CREATE INDEX IF NOT EXISTS idx_orders_product_created_at ON orders (product_id, created_at);
+
+-- Audit log table
+CREATE TABLE IF NOT EXISTS audit_log (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    event_type TEXT NOT NULL,
+    order_id TEXT,
+    product_id TEXT,
+    details TEXT,
+    user_ip TEXT,
+    timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Products cache table (for analytics)
+CREATE TABLE IF NOT EXISTS products (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    product_id TEXT UNIQUE NOT NULL,
+    last_stock_level REAL,
+    last_reorder_point REAL,
+    last_safety_stock REAL,
+    total_orders INTEGER DEFAULT 0,
+    total_quantity_ordered INTEGER DEFAULT 0,
+    last_order_date TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Running order aggregates kept current by triggers (dashboard reads)
+CREATE TABLE IF NOT EXISTS order_stats (
+    k TEXT PRIMARY KEY,
+    v REAL NOT NULL
+);
+
+INSERT OR IGNORE INTO order_stats (k, v)
+SELECT 'total_orders', COUNT(*) FROM orders
+UNION ALL SELECT 'confidence_sum', COALESCE(SUM(confidence), 0) FROM orders
+UNION ALL SELECT 'confidence_count', COUNT(confidence) FROM orders;
+
+CREATE TRIGGER IF NOT EXISTS trg_orders_stats_insert AFTER INSERT ON orders
+BEGIN
+    UPDATE order_stats SET v = v + 1 WHERE k = 'total_orders';
+    UPDATE order_stats SET v = v + NEW.confidence
+        WHERE k = 'confidence_sum' AND NEW.confidence IS NOT NULL;
+    UPDATE order_stats SET v = v + 1
+        WHERE k = 'confidence_count' AND NEW.confidence IS NOT NULL;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_orders_stats_delete AFTER DELETE ON orders
+BEGIN
+    UPDATE order_stats SET v = v - 1 WHERE k = 'total_orders';
+    UPDATE order_stats SET v = v - OLD.confidence
+        WHERE k = 'confidence_sum' AND OLD.confidence IS NOT NULL;
+    UPDATE order_stats SET v = v - 1
+        WHERE k = 'confidence_count' AND OLD.confidence IS NOT NULL;
+END;
+
+COMMIT;
+"""
+
+# Legacy rows as the STRICT table accepts them: the old INTEGER-affinity
+# quantity column could hold fractional LLM quantities, which are rounded to
+# whole units (as save_order does), and a NULL status becomes 'pending'
+_LEGACY_ORDERS_SELECT = (
+    "order_id, product_id, action, CAST(ROUND(quantity) AS INTEGER), confidence, "
+    "COALESCE(status, 'pending'), llm_provider, reasoning, safety_stock, "
+    "reorder_point, current_stock, shortage, estimated_cost, supplier_id, "
+    "created_at, executed_at, approved_by, approved_at"
+)
+
+# Rebuilds an orders table created with the old autoincrement id column
+_MIGRATE_LEGACY_ORDERS = f"""
+BEGIN IMMEDIATE;
+ALTER TABLE orders RENAME TO orders_legacy;
+{_ORDERS_TABLE_DDL}
+INSERT INTO orders ({_ORDERS_COLUMNS})
+SELECT {_LEGACY_ORDERS_SELECT} FROM orders_legacy;
+DROP TABLE orders_legacy;
+COMMIT;
+"""
+
+
+async def _migrate_legacy_orders_table(db: aiosqlite.Connection):
+    """
+    Migrate a legacy rowid-keyed orders table, if present.
+    
+    If a legacy row can't be converted, the migration is rolled back and
+    the legacy table is kept as-is (it is still fully usable).
+    """
+    async with db.execute("PRAGMA table_info(orders)") as cursor:
+        columns = [row[1] for row in await cursor.fetchall()]
+    
+    if "id" in columns:
+        logger.info("Migrating orders table to WITHOUT ROWID layout")
+        try:
+            await db.executescript(_MIGRATE_LEGACY_ORDERS)
+        except Exception as e:
+            await db.rollback()
+            logger.error(f"Orders table migration failed, keeping legacy table: {str(e)}")
+
 
 async def init_database():
     """Initialize database tables if they don't exist."""
@@ -19,63 +181,17 @@ async def init_database():
     DB_PATH.parent.mkdir(parents=True, exist_ok=True)
     
     async with aiosqlite.connect(DB_PATH) as db:
-        # Orders table
-        await db.execute("""
-            CREATE TABLE IF NOT EXISTS orders (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                order_id TEXT UNIQUE NOT NULL,
-                product_id TEXT NOT NULL,
-                action TEXT NOT NULL,
-                quantity INTEGER NOT NULL,
-                confidence REAL,
-                status TEXT DEFAULT 'pending',
-                llm_provider TEXT,
-                reasoning TEXT,
-                safety_stock REAL,
-                reorder_point REAL,
-                current_stock REAL,
-                shortage REAL,
-                estimated_cost REAL,
-                supplier_id TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                executed_at TIMESTAMP,
-                approved_by TEXT,
-                approved_at TIMESTAMP
-            )
-        """)
-        
-        # Audit log table
-        await db.execute("""
-            CREATE TABLE IF NOT EXISTS audit_log (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                event_type TEXT NOT NULL,
-                order_id TEXT,
-                product_id TEXT,
-                details TEXT,
-                user_ip TEXT,
-                timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        
-        # Products cache table (for analytics)
-        await db.execute("""
-            CREATE TABLE IF NOT EXISTS products (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                product_id TEXT UNIQUE NOT NULL,
-                last_stock_level REAL,
-                last_reorder_point REAL,
-                last_safety_stock REAL,
-                total_orders INTEGER DEFAULT 0,
-                total_quantity_ordered INTEGER DEFAULT 0,
-                last_order_date TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        
-        await db.commit()
+        await _migrate_legacy_orders_table(db)
+        await db.executescript(_SCHEMA_DDL)
         logger.info("Database initialized successfully")
 
 
+def _whole_units(quantity: Any) -> int:
+    """Round a (possibly fractional) LLM quantity half away from zero, like SQLite ROUND."""
+    quantity = float(quantity)
+    return int(math.copysign(math.floor(abs(quantity) + 0.5), quantity))
+
+
 async def save_order(order: Dict[str, Any]) -> bool:
     """
     Save order to database.
@@ -86,7 +202,13 @@ async def save_order(order: Dict[str, Any]) -> bool:
     Returns:
         bool: True if saved successfully
     """
+    now_iso = datetime.now().isoformat()
+    row = {**_ORDER_DEFAULTS, **order}
+    
     try:
+        # Orders store whole units; the product totals add the same value
+        row["quantity"] = _whole_units(row["quantity"])
+        
         async with aiosqlite.connect(DB_PATH) as db:
             await db.execute("""
                 INSERT INTO orders (
@@ -94,22 +216,14 @@ async def save_order(order: Dict[str, Any]) -> bool:
                     status, llm_provider, reasoning, safety_stock,
                     reorder_point, current_stock, shortage, estimated_cost,
                     executed_at
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                order.get("order_id"),
-                order.get("product_id"),
-                order.get("action"),
-                order.get("quantity"),
-                order.get("confidence"),
-                order.get("status", "pending"),
-                order.get("llm_provider"),
-                order.get("reasoning"),
-                order.get("safety_stock"),
-                order.get("reorder_point"),
-                order.get("current_stock"),
-                order.get("shortage"),
-                order.get("estimated_cost"),
-                datetime.now().isoformat() if order.get("status") == "executed" else None
+                ) VALUES (
+                    ?, ?, ?, ?, ?,
+                    COALESCE(?, 'pending'), ?, ?, ?,
+                    ?, ?, ?, ?,
+                    ?
+                )
+            """, _order_values(row) + (
+                now_iso if row["status"] == "executed" else None,
             ))
             
             # Update product cache
@@ -126,12 +240,12 @@ async def save_order(order: Dict[str, Any]) -> bool:
                     last_order_date = excluded.last_order_date,
                     updated_at = CURRENT_TIMESTAMP
             """, (
-                order.get("product_id"),
-                order.get("current_stock"),
-                order.get("reorder_point"),
-                order.get("safety_stock"),
-                order.get("quantity", 0),
-                datetime.now().isoformat()
+                row["product_id"],
+                row["current_stock"],
+                row["reorder_point"],
+                row["safety_stock"],
+                row["quantity"],
+                now_iso
             ))
             
             await db.commit()
@@ -143,6 +257,26 @@ async def save_order(order: Dict[str, Any]) -> bool:
         return False
 
 
+def _build_orders_query(
+    status: Optional[str] = None,
+    product_id: Optional[str] = None
+) -> Tuple[str, List[Any]]:
+    """Build the filtered orders SELECT shared by get_orders and iter_orders."""
+    query = f"SELECT {_ORDERS_COLUMNS} FROM orders WHERE 1=1"
+    params: List[Any] = []
+    
+    if status:
+        query += " AND status = ?"
+        params.append(status)
+    
+    if product_id:
+        query += " AND product_id = ?"
+        params.append(product_id)
+    
+    query += " ORDER BY created_at DESC LIMIT ?"
+    return query, params
+
+
 async def get_orders(
     limit: int = 50,
     status: Optional[str] = None,
@@ -163,29 +297,53 @@ async def get_orders(
         async with aiosqlite.connect(DB_PATH) as db:
             db.row_factory = aiosqlite.Row
             
-            query = "SELECT * FROM orders WHERE 1=1"
-            params = []
-            
-            if status:
-                query += " AND status = ?"
-                params.append(status)
-            
-            if product_id:
-                query += " AND product_id = ?"
-                params.append(product_id)
-            
-            query += " ORDER BY created_at DESC LIMIT ?"
+            query, params = _build_orders_query(status, product_id)
             params.append(limit)
             
             async with db.execute(query, params) as cursor:
-                rows = await cursor.fetchall()
-                return [dict(row) for row in rows]
+                return list(map(dict, await cursor.fetchall()))
                 
     except Exception as e:
         logger.error(f"Failed to get orders: {str(e)}")
         return []
 
 
+async def iter_orders(
+    limit: int = 50,
+    status: Optional[str] = None,
+    product_id: Optional[str] = None,
+    batch_size: int = ORDERS_FETCH_BATCH_SIZE
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Stream orders from database one dict at a time.
+    
+    Same filtering as get_orders, but rows are pulled in batches of
+    `batch_size` so large exports never hold the full result set in memory.
+    
+    Args:
+        limit: Maximum number of orders to yield
+        status: Filter by status (pending, executed, rejected)
+        product_id: Filter by product ID
+        batch_size: Number of rows fetched from SQLite per round-trip
+        
+    Yields:
+        Order dictionaries
+    """
+    async with aiosqlite.connect(DB_PATH) as db:
+        db.row_factory = aiosqlite.Row
+        
+        query, params = _build_orders_query(status, product_id)
+        params.append(limit)
+        
+        async with db.execute(query, params) as cursor:
+            while True:
+                rows = await cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for row in rows:
+                    yield dict(row)
+
+
 async def get_order_by_id(order_id: str) -> Optional[Dict[str, Any]]:
     """Get a single order by ID."""
     try:
@@ -193,7 +351,7 @@ async def get_order_by_id(order_id: str) -> Optional[Dict[str, Any]]:
             db.row_factory = aiosqlite.Row
             
             async with db.execute(
-                "SELECT * FROM orders WHERE order_id = ?", (order_id,)
+                f"SELECT {_ORDERS_COLUMNS} FROM orders WHERE order_id = ?", (order_id,)
             ) as cursor:
                 row = await cursor.fetchone()
                 return dict(row) if row else None
@@ -214,9 +372,9 @@ async def update_order_status(
             if status in ["approved", "rejected"]:
                 await db.execute("""
                     UPDATE orders 
-                    SET status = ?, approved_by = ?, approved_at = ?
+                    SET status = ?, approved_by = ?, approved_at = CURRENT_TIMESTAMP
                     WHERE order_id = ?
-                """, (status, approved_by, datetime.now().isoformat(), order_id))
+                """, (status, approved_by, order_id))
             else:
                 await db.execute(
                     "UPDATE orders SET status = ? WHERE order_id = ?",
@@ -238,26 +396,104 @@ async def log_audit_event(
     details: Optional[str] = None,
     user_ip: Optional[str] = None
 ):
-    """Log an audit event."""
+    """
+    Log an audit event.
+    
+    Events are queued and written in batches by the background audit writer
+    (see start_audit_writer). If the writer is not running, the event is
+    written directly. Events are dropped, and counted, when the queue is full.
+    """
+    event = (event_type, order_id, product_id, details, user_ip)
+    
+    if _audit_writer is None or _audit_writer.done():
+        await _write_audit_events([event])
+        return
+    
+    try:
+        _audit_queue.put_nowait(event)
+    except asyncio.QueueFull:
+        metrics.audit_log_dropped_total.inc()
+        logger.warning(f"Audit queue full, dropped {event_type} event")
+
+
+async def _write_audit_events(events: List[Tuple[Any, ...]]):
+    """Insert a batch of audit events in a single transaction."""
     try:
         async with aiosqlite.connect(DB_PATH) as db:
-            await db.execute("""
+            await db.executemany("""
                 INSERT INTO audit_log (event_type, order_id, product_id, details, user_ip)
                 VALUES (?, ?, ?, ?, ?)
-            """, (event_type, order_id, product_id, details, user_ip))
+            """, events)
             await db.commit()
             
     except Exception as e:
-        logger.error(f"Failed to log audit event: {str(e)}")
+        logger.error(f"Failed to log {len(events)} audit event(s): {str(e)}")
+
+
+def _drain_audit_queue() -> List[Tuple[Any, ...]]:
+    """Pull up to AUDIT_BATCH_SIZE queued events without waiting."""
+    events = []
+    while len(events) < AUDIT_BATCH_SIZE:
+        try:
+            events.append(_audit_queue.get_nowait())
+        except asyncio.QueueEmpty:
+            break
+    return events
+
+
+async def _run_audit_writer():
+    """Flush queued audit events every AUDIT_FLUSH_INTERVAL seconds."""
+    write: Optional[asyncio.Task] = None
+    try:
+        while True:
+            await asyncio.sleep(AUDIT_FLUSH_INTERVAL)
+            events = _drain_audit_queue()
+            if events:
+                # Run the write as its own task (shielded) so a shutdown
+                # mid-write can still wait for the batch below
+                write = asyncio.create_task(_write_audit_events(events))
+                await asyncio.shield(write)
+    except asyncio.CancelledError:
+        # Finish the in-flight batch, then flush whatever is left
+        if write is not None:
+            await write
+        while events := _drain_audit_queue():
+            await _write_audit_events(events)
+        raise
+
+
+def start_audit_writer():
+    """Start the background audit log writer (call on application startup)."""
+    global _audit_writer
+    
+    if _audit_writer is None or _audit_writer.done():
+        _audit_writer = asyncio.create_task(_run_audit_writer())
+        logger.info("Audit log writer started")
+
+
+async def stop_audit_writer():
+    """Stop the audit log writer, flushing any queued events."""
+    global _audit_writer
+    
+    if _audit_writer is not None:
+        _audit_writer.cancel()
+        try:
+            await _audit_writer
+        except asyncio.CancelledError:
+            pass
+        _audit_writer = None
+        logger.info("Audit log writer stopped")
 
 
 async def get_dashboard_stats() -> Dict[str, Any]:
     """Get statistics for dashboard display."""
     try:
         async with aiosqlite.connect(DB_PATH) as db:
-            # Total orders
-            async with db.execute("SELECT COUNT(*) FROM orders") as cursor:
-                total_orders = (await cursor.fetchone())[0]
+            # Total orders and confidence aggregates (maintained by triggers)
+            async with db.execute("SELECT k, v FROM order_stats") as cursor:
+                order_stats = {row[0]: row[1] for row in await cursor.fetchall()}
+            total_orders = int(order_stats.get("total_orders", 0))
+            confidence_count = order_stats.get("confidence_count", 0)
             
             # Orders by status
             async with db.execute("""
@@ -265,16 +501,18 @@ async def get_dashboard_stats() -> Dict[str, Any]:
             """) as cursor:
                 status_counts = {row[0]: row[1] for row in await cursor.fetchall()}
             
-            # Recent orders
+            # Recent orders (only the columns the dashboard list shows)
             db.row_factory = aiosqlite.Row
             async with db.execute("""
-                SELECT * FROM orders ORDER BY created_at DESC LIMIT 10
+                SELECT order_id, product_id, action, quantity, status, created_at
+                FROM orders ORDER BY created_at DESC LIMIT 10
             """) as cursor:
                 recent_orders = [dict(row) for row in await cursor.fetchall()]
             
             # Avg confidence
-            async with db.execute("SELECT AVG(confidence) FROM orders") as cursor:
-                avg_confidence = (await cursor.fetchone())[0] or 0
+            avg_confidence = (
+                order_stats["confidence_sum"] / confidence_count if confidence_count else 0
+            )
             
             # Products summary
             async with db.execute("""
@@ -53,3 +53,9 @@ current_safety_stock = Gauge(
     'Current safety stock level',
     ['product_id']
 )
+
+# Internal metrics
+audit_log_dropped_total = Counter(
+    'audit_log_dropped_total',
+    'Audit log events dropped because the write queue was full'
+)
@@ -5,18 +5,59 @@ Provides async MongoDB connection and database operations for production deploym
 Falls back to SQLite if MONGODB_URI is not configured.
 """
 import os
-from typing import Optional, Dict, List, Any
-from motor.motor_asyncio import AsyncIOMotorClient
-from datetime import datetime
+import time
+from typing import Optional, Dict, List, Any, Tuple
+from pymongo import AsyncMongoClient
+from pymongo.errors import BulkWriteError
+from bson import ObjectId
+from datetime import datetime, timezone
 import structlog
 
+from utils.retry import retry_mongo_write
+
 logger = structlog.get_logger()
 
 # MongoDB connection globals
 MONGODB_URI = os.getenv("MONGODB_URI")
-mongo_client: Optional[AsyncIOMotorClient] = None
+mongo_client: Optional[AsyncMongoClient] = None
 mongo_db = None
 
+# Connection pool tuning (minPoolSize keeps warm connections for the first requests)
+MONGO_MAX_POOL = int(os.getenv("MONGO_MAX_POOL", "50"))
+MONGO_MIN_POOL = int(os.getenv("MONGO_MIN_POOL", "5"))
+# Wire compression. zlib ships with Python; zstd/snappy need the
+# pymongo[zstd] / pymongo[snappy] extras (PyMongo warns and skips them otherwise)
+MONGO_COMPRESSORS = os.getenv("MONGO_COMPRESSORS", "zlib")
+
+# Fields left out of order listings (long LLM output, fetched per order instead)
+ORDER_LIST_PROJECTION = {"reasoning": 0}
+
+# Pipeline stages shaping listed orders server-side: drop long fields and
+# return _id as a hex string, ready for JSON and for next_cursor
+_ORDER_LIST_STAGES = [
+    {"$project": ORDER_LIST_PROJECTION},
+    {"$addFields": {"_id": {"$toString": "$_id"}}}
+]
+
+# Unfiltered order total from collection metadata, cached as (expires_at, count)
+ORDER_COUNT_TTL = 10.0  # seconds
+_order_count_cache: Optional[Tuple[float, int]] = None
+
+
+async def _ensure_indexes(db):
+    """Create the indexes used by the order queries (no-op if they exist)."""
+    try:
+        # Point lookups/updates by order_id
+        await db.orders.create_index("order_id", unique=True)
+        # Keyset pagination, unfiltered and filtered by status
+        await db.orders.create_index([("created_at", -1), ("_id", -1)])
+        await db.orders.create_index([("status", 1), ("created_at", -1), ("_id", -1)])
+        # Telegram subscriber registrations
+        await db.telegram_subscribers.create_index("chat_id", unique=True)
+    except Exception as e:
+        # Queries still work without indexes, just slower
+        logger.warning("⚠️ Failed to create MongoDB indexes", error=str(e))
+
 
 async def connect_mongodb():
     """
@@ -28,13 +69,19 @@ async def connect_mongodb():
     
     if MONGODB_URI:
         try:
-            mongo_client = AsyncIOMotorClient(
+            mongo_client = AsyncMongoClient(
                 MONGODB_URI,
-                serverSelectionTimeoutMS=5000  # 5 second timeout
+                serverSelectionTimeoutMS=5000,  # 5 second timeout
+                maxPoolSize=MONGO_MAX_POOL,
+                minPoolSize=MONGO_MIN_POOL,
+                maxIdleTimeMS=60000,
+                retryWrites=True,
+                compressors=MONGO_COMPRESSORS
             )
             # Verify connection
             await mongo_client.admin.command('ping')
             mongo_db = mongo_client.inventory_db
+            await _ensure_indexes(mongo_db)
             logger.info("✅ Connected to MongoDB Atlas", db="MongoDB")
         except Exception as e:
             logger.error("❌ Failed to connect to MongoDB", error=str(e))
@@ -50,7 +97,7 @@ async def close_mongodb():
     global mongo_client
     
     if mongo_client:
-        mongo_client.close()
+        await mongo_client.close()
         logger.info("✅ Closed MongoDB connection")
 
 
@@ -64,6 +111,20 @@ def get_db():
     return mongo_db
 
 
+@retry_mongo_write
+async def _set_order_status(db, order_id: str, new_status: str):
+    """Set an order's status, retrying transient connection errors."""
+    return await db.orders.update_one(
+        {"order_id": order_id},
+        {
+            "$set": {
+                "status": new_status,
+                "updated_at": datetime.now(timezone.utc)
+            }
+        }
+    )
+
+
 async def save_order(order_data: Dict[str, Any]) -> bool:
     """
     Save order to MongoDB or SQLite fallback.
@@ -74,77 +135,211 @@ async def save_order(order_data: Dict[str, Any]) -> bool:
     Returns:
         True if saved successfully, False otherwise
     """
+    return await save_orders([order_data]) == 1
+
+
+async def save_orders(orders: List[Dict[str, Any]]) -> int:
+    """
+    Save a batch of orders to MongoDB in one round-trip.
+    
+    Uses an unordered insert_many so one bad document doesn't block the
+    rest of the batch.
+    
+    Args:
+        orders: Order dictionaries containing order details
+        
+    Returns:
+        Number of orders saved (0 when MongoDB is not configured)
+    """
     db = get_db()
     
     if db is not None:
+        if not orders:
+            return 0
+        
         # Use MongoDB
+        now = datetime.now(timezone.utc)
+        order_docs = [
+            {**order_data, "created_at": now, "updated_at": now}
+            for order_data in orders
+        ]
         try:
-            order_doc = {
-                **order_data,
-                "created_at": datetime.utcnow(),
-                "updated_at": datetime.utcnow()
-            }
-            result = await db.orders.insert_one(order_doc)
-            logger.info("💾 Order saved to MongoDB", 
-                       order_id=order_data.get("order_id"),
-                       mongo_id=str(result.inserted_id))
-            return True
+            # Not wrapped in retry_mongo_write: re-sending an insert that the
+            # server already applied would fail on duplicate keys. The
+            # client's retryWrites covers this case safely.
+            result = await db.orders.insert_many(order_docs, ordered=False)
+            saved = len(result.inserted_ids)
+        except BulkWriteError as e:
+            saved = e.details.get("nInserted", 0)
+            logger.error("❌ Some orders failed to save to MongoDB",
+                        failed=len(e.details.get("writeErrors", [])))
         except Exception as e:
-            logger.error("❌ Failed to save order to MongoDB", error=str(e))
-            return False
+            logger.error("❌ Failed to save orders to MongoDB", error=str(e))
+            return 0
+        
+        logger.info("💾 Orders saved to MongoDB", count=saved,
+                   order_ids=[o.get("order_id") for o in orders])
+        return saved
     else:
         # SQLite fallback handled by existing code
         logger.debug("Using SQLite for order storage")
-        return False  # Caller should handle SQLite
+        return 0  # Caller should handle SQLite
 
 
 async def get_orders(
     status: Optional[str] = None,
     limit: int = 100,
-    skip: int = 0
-) -> List[Dict[str, Any]]:
+    after: Optional[Tuple[datetime, str]] = None
+) -> Tuple[List[Dict[str, Any]], Optional[Tuple[datetime, str]]]:
     """
-    Retrieve orders from MongoDB.
+    Retrieve a page of orders from MongoDB, newest first.
+    
+    Uses keyset (cursor) pagination: pass the `next_cursor` returned by the
+    previous call as `after` to fetch the following page. Unlike skip(),
+    this seeks straight to the page via the (created_at, _id) index.
     
     Args:
         status: Filter by status (executed, pending_review, etc.)
         limit: Maximum number of orders to return
-        skip: Number of orders to skip (pagination)
+        after: (created_at, _id) of the last order on the previous page
         
     Returns:
-        List of order dictionaries
+        Tuple of (orders, next_cursor); next_cursor is None on the last page
     """
     db = get_db()
     
     if db is not None:
         try:
-            query = {}
+            query: Dict[str, Any] = {}
             if status:
                 query["status"] = status
+            if after:
+                query.update(_after_cursor_filter(after))
             
-            cursor = db.orders.find(query).sort("created_at", -1).skip(skip).limit(limit)
+            cursor = await db.orders.aggregate([
+                {"$match": query},
+                {"$sort": {"created_at": -1, "_id": -1}},
+                {"$limit": limit},
+                *_ORDER_LIST_STAGES
+            ])
             orders = await cursor.to_list(length=limit)
             
-            # Convert ObjectId to string for JSON serialization
-            for order in orders:
-                order["_id"] = str(order["_id"])
+            next_cursor = None
+            if len(orders) == limit:
+                next_cursor = (orders[-1]["created_at"], orders[-1]["_id"])
             
             logger.debug("📋 Retrieved orders from MongoDB", count=len(orders))
-            return orders
+            return orders, next_cursor
         except Exception as e:
             logger.error("❌ Failed to retrieve orders from MongoDB", error=str(e))
-            return []
+            return [], None
     else:
         # SQLite fallback handled by existing code
-        return []
+        return [], None
 
 
-async def get_order_by_id(order_id: str) -> Optional[Dict[str, Any]]:
+async def get_orders_page(
+    status: Optional[str] = None,
+    limit: int = 100,
+    after: Optional[Tuple[datetime, str]] = None
+) -> Dict[str, Any]:
+    """
+    Retrieve a page of orders together with the total matching count.
+    
+    With a status filter, the page and the count come from one aggregation
+    ($facet) so the matching orders are only walked once. Without a filter,
+    the total is the collection's estimated document count (a metadata
+    read), cached for ORDER_COUNT_TTL seconds.
+    
+    Args:
+        status: Filter by status (executed, pending_review, etc.)
+        limit: Maximum number of orders to return
+        after: (created_at, _id) of the last order on the previous page
+        
+    Returns:
+        Dict with "orders", "total" and "next_cursor"
+    """
+    db = get_db()
+    
+    if db is None:
+        return {"orders": [], "total": 0, "next_cursor": None}
+    
+    if not status:
+        orders, next_cursor = await get_orders(limit=limit, after=after)
+        return {
+            "orders": orders,
+            "total": await _estimated_order_count(db),
+            "next_cursor": next_cursor
+        }
+    
+    try:
+        page_pipeline: List[Dict[str, Any]] = []
+        if after:
+            page_pipeline.append({"$match": _after_cursor_filter(after)})
+        page_pipeline += [{"$limit": limit}, *_ORDER_LIST_STAGES]
+        
+        cursor = await db.orders.aggregate([
+            {"$match": {"status": status}},
+            {"$sort": {"created_at": -1, "_id": -1}},
+            {"$facet": {
+                "data": page_pipeline,
+                "meta": [{"$count": "total"}]
+            }}
+        ])
+        result = (await cursor.to_list(length=1))[0]
+        
+        orders = result["data"]
+        
+        next_cursor = None
+        if len(orders) == limit:
+            next_cursor = (orders[-1]["created_at"], orders[-1]["_id"])
+        
+        total = result["meta"][0]["total"] if result["meta"] else 0
+        return {"orders": orders, "total": total, "next_cursor": next_cursor}
+    except Exception as e:
+        logger.error("❌ Failed to retrieve order page from MongoDB", error=str(e))
+        return {"orders": [], "total": 0, "next_cursor": None}
+
+
+def _after_cursor_filter(after: Tuple[datetime, str]) -> Dict[str, Any]:
+    """Filter selecting orders sorted strictly after a (created_at, _id) cursor."""
+    after_created_at, after_id = after
+    return {
+        "$or": [
+            {"created_at": {"$lt": after_created_at}},
+            {"created_at": after_created_at, "_id": {"$lt": ObjectId(after_id)}}
+        ]
+    }
+
+
+async def _estimated_order_count(db) -> int:
+    """Return the (cached) estimated number of orders in the collection."""
+    global _order_count_cache
+    
+    now = time.monotonic()
+    if _order_count_cache is not None and _order_count_cache[0] > now:
+        return _order_count_cache[1]
+    
+    try:
+        count = await db.orders.estimated_document_count()
+    except Exception as e:
+        logger.error("❌ Failed to count orders in MongoDB", error=str(e))
+        return _order_count_cache[1] if _order_count_cache else 0
+    
+    _order_count_cache = (now + ORDER_COUNT_TTL, count)
+    return count
+
+
+async def get_order_by_id(
+    order_id: str,
+    projection: Optional[Dict[str, int]] = None
+) -> Optional[Dict[str, Any]]:
     """
     Get a specific order by ID from MongoDB.
     
     Args:
         order_id: The order ID to retrieve
+        projection: Optional field projection (default: full document)
         
     Returns:
         Order dictionary or None if not found
@@ -153,7 +348,7 @@ async def get_order_by_id(order_id: str) -> Optional[Dict[str, Any]]:
     
     if db is not None:
         try:
-            order = await db.orders.find_one({"order_id": order_id})
+            order = await db.orders.find_one({"order_id": order_id}, projection=projection)
             if order:
                 order["_id"] = str(order["_id"])
             return order
@@ -180,15 +375,7 @@ async def update_order_status(order_id: str, new_status: str) -> bool:
     
     if db is not None:
         try:
-            result = await db.orders.update_one(
-                {"order_id": order_id},
-                {
-                    "$set": {
-                        "status": new_status,
-                        "updated_at": datetime.utcnow()
-                    }
-                }
-            )
+            result = await _set_order_status(db, order_id, new_status)
             
             if result.modified_count > 0:
                 logger.info("✅ Order status updated", 
@@ -203,3 +390,56 @@ async def update_order_status(order_id: str, new_status: str) -> bool:
             return False
     else:
         return False
+
+
+async def save_telegram_subscriber(chat_id: str, user_name: str) -> bool:
+    """
+    Register (or refresh) a Telegram chat subscribed to notifications.
+    
+    Args:
+        chat_id: Telegram chat ID
+        user_name: Display name of the user who sent /start
+        
+    Returns:
+        True if saved, False if MongoDB is unavailable or the write failed
+    """
+    db = get_db()
+    
+    if db is not None:
+        try:
+            await db.telegram_subscribers.update_one(
+                {"chat_id": chat_id},
+                {"$set": {
+                    "chat_id": chat_id,
+                    "user_name": user_name,
+                    "registered_at": datetime.now(timezone.utc)
+                }},
+                upsert=True
+            )
+            return True
+        except Exception as e:
+            logger.error("❌ Failed to save Telegram subscriber",
+                        chat_id=chat_id, error=str(e))
+            return False
+    else:
+        return False
+
+
+async def get_telegram_subscriber_ids() -> List[str]:
+    """
+    Get the chat IDs of all registered Telegram subscribers.
+    
+    Returns:
+        List of chat IDs (empty if MongoDB is unavailable)
+    """
+    db = get_db()
+    
+    if db is not None:
+        try:
+            cursor = db.telegram_subscribers.find({}, projection={"_id": 0, "chat_id": 1})
+            return [doc["chat_id"] async for doc in cursor]
+        except Exception as e:
+            logger.error("❌ Failed to load Telegram subscribers", error=str(e))
+            return []
+    else:
+        return []
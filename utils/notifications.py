@@ -3,11 +3,162 @@
 import os
 import httpx
 import logging
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Tuple
 from datetime import datetime
 
+from utils.serialization import dumps, JSON_HEADERS
+from utils.retry import retry_http_post
+
 logger = logging.getLogger(__name__)
 
+# Notification targets (resolved once; changing them requires a restart)
+SLACK_WEBHOOK_URL = os.getenv("SLACK_WEBHOOK_URL")
+NOTIFICATION_EMAIL = os.getenv("NOTIFICATION_EMAIL")
+
+try:
+    import h2  # noqa: F401 - enables HTTP/2 support in httpx
+    HTTP2_ENABLED = True
+except ImportError:
+    HTTP2_ENABLED = False
+
+# Shared HTTP client (connection pool reused across notifications)
+_http_client: Optional[httpx.AsyncClient] = None
+
+
+async def init_http():
+    """Create the shared HTTP client (call on application startup)."""
+    global _http_client
+    
+    if _http_client is None:
+        _http_client = httpx.AsyncClient(
+            http2=HTTP2_ENABLED,
+            limits=httpx.Limits(max_keepalive_connections=20, max_connections=100),
+            timeout=10.0
+        )
+
+
+async def close_http():
+    """Close the shared HTTP client (call on application shutdown)."""
+    global _http_client
+    
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+
+async def _get_http_client() -> httpx.AsyncClient:
+    """Return the shared HTTP client, creating it if startup didn't."""
+    if _http_client is None:
+        await init_http()
+    return _http_client
+
+
+def truncate(text: str, limit: int) -> str:
+    """Shorten text to at most limit characters, marking cuts with an ellipsis."""
+    return text if len(text) <= limit else text[:limit] + "…"
+
+
+@retry_http_post
+async def _post_slack(webhook_url: str, message: Dict[str, Any]) -> httpx.Response:
+    """POST a Slack message, retrying transient connection errors."""
+    client = await _get_http_client()
+    return await client.post(
+        webhook_url,
+        content=dumps(message),
+        headers=JSON_HEADERS,
+        timeout=10.0
+    )
+
+
+# Static parts of the Slack order message (shallow-copied per message)
+_SLACK_SKELETON: Dict[str, Any] = {
+    "channel": None,
+    "username": "Inventory Agent",
+    "icon_emoji": ":robot_face:",
+    "attachments": []
+}
+
+
+# Slack block builders, by name. Each returns a fresh block for one order;
+# style is the (emoji, status_text) pair for the order's confidence.
+
+def _slack_header_block(order: Dict[str, Any], style: Tuple[str, str]) -> Dict[str, Any]:
+    return {
+        "type": "header",
+        "text": {"type": "plain_text", "text": f"{style[0]} Inventory Order Generated", "emoji": True}
+    }
+
+
+def _slack_fields_block(order: Dict[str, Any], style: Tuple[str, str]) -> Dict[str, Any]:
+    return {
+        "type": "section",
+        "fields": [
+            {"type": "mrkdwn", "text": f"*Product:*\n{order.get('product_id', 'Unknown')}"},
+            {"type": "mrkdwn", "text": f"*Action:*\n{order.get('action', 'Unknown').upper()}"},
+            {"type": "mrkdwn", "text": f"*Quantity:*\n{order.get('quantity', 0):,} units"},
+            {"type": "mrkdwn", "text": f"*Confidence:*\n{order.get('confidence', 0):.0%}"}
+        ]
+    }
+
+
+def _slack_status_block(order: Dict[str, Any], style: Tuple[str, str]) -> Dict[str, Any]:
+    return {
+        "type": "section",
+        "text": {"type": "mrkdwn", "text": f"*Status:* {style[1]}"}
+    }
+
+
+def _slack_reasoning_block(order: Dict[str, Any], style: Tuple[str, str]) -> Dict[str, Any]:
+    return {
+        "type": "section",
+        "text": {"type": "mrkdwn", "text": f"*AI Reasoning:*\n_{truncate(order['reasoning'], 500)}_"}
+    }
+
+
+def _slack_context_block(order: Dict[str, Any], style: Tuple[str, str]) -> Dict[str, Any]:
+    return {
+        "type": "context",
+        "elements": [{
+            "type": "mrkdwn",
+            "text": f"📋 Order ID: `{order.get('order_id', 'N/A')}` | 🕐 {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
+        }]
+    }
+
+
+def _slack_actions_block(order: Dict[str, Any], style: Tuple[str, str]) -> Dict[str, Any]:
+    # Approve/Reject buttons for low confidence orders
+    order_id = order.get("order_id", "")
+    return {
+        "type": "actions",
+        "elements": [
+            {
+                "type": "button",
+                "text": {"type": "plain_text", "text": "✅ Approve"},
+                "style": "primary",
+                "value": order_id
+            },
+            {
+                "type": "button",
+                "text": {"type": "plain_text", "text": "❌ Reject"},
+                "style": "danger",
+                "value": order_id
+            }
+        ]
+    }
+
+
+# Block builders per message variant, keyed by (has_reasoning, needs_buttons)
+_SLACK_LAYOUTS: Dict[tuple, tuple] = {
+    (True, True): (_slack_header_block, _slack_fields_block, _slack_status_block,
+                   _slack_reasoning_block, _slack_context_block, _slack_actions_block),
+    (True, False): (_slack_header_block, _slack_fields_block, _slack_status_block,
+                    _slack_reasoning_block, _slack_context_block),
+    (False, True): (_slack_header_block, _slack_fields_block, _slack_status_block,
+                    _slack_context_block, _slack_actions_block),
+    (False, False): (_slack_header_block, _slack_fields_block, _slack_status_block,
+                     _slack_context_block)
+}
+
 
 async def send_slack_notification(
     order: Dict[str, Any],
@@ -25,7 +176,7 @@ async def send_slack_notification(
     Returns:
         bool: True if sent successfully
     """
-    webhook_url = webhook_url or os.getenv("SLACK_WEBHOOK_URL")
+    webhook_url = webhook_url or SLACK_WEBHOOK_URL
     
     if not webhook_url:
         logger.warning("No Slack webhook URL configured, skipping notification")
@@ -46,109 +197,23 @@ async def send_slack_notification(
         color = "#ff6600"  # Orange
         status_text = "Needs Human Review"
     
-    # Build Slack message
-    message = {
-        "channel": channel,
-        "username": "Inventory Agent",
-        "icon_emoji": ":robot_face:",
-        "attachments": [
-            {
-                "color": color,
-                "blocks": [
-                    {
-                        "type": "header",
-                        "text": {
-                            "type": "plain_text",
-                            "text": f"{emoji} Inventory Order Generated",
-                            "emoji": True
-                        }
-                    },
-                    {
-                        "type": "section",
-                        "fields": [
-                            {
-                                "type": "mrkdwn",
-                                "text": f"*Product:*\n{order.get('product_id', 'Unknown')}"
-                            },
-                            {
-                                "type": "mrkdwn",
-                                "text": f"*Action:*\n{order.get('action', 'Unknown').upper()}"
-                            },
-                            {
-                                "type": "mrkdwn",
-                                "text": f"*Quantity:*\n{order.get('quantity', 0):,} units"
-                            },
-                            {
-                                "type": "mrkdwn",
-                                "text": f"*Confidence:*\n{confidence:.0%}"
-                            }
-                        ]
-                    },
-                    {
-                        "type": "section",
-                        "text": {
-                            "type": "mrkdwn",
-                            "text": f"*Status:* {status_text}"
-                        }
-                    },
-                    {
-                        "type": "context",
-                        "elements": [
-                            {
-                                "type": "mrkdwn",
-                                "text": f"📋 Order ID: `{order.get('order_id', 'N/A')}` | 🕐 {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
-                            }
-                        ]
-                    }
-                ]
-            }
-        ]
-    }
-    
-    # Add reasoning if available
-    if order.get("reasoning"):
-        message["attachments"][0]["blocks"].insert(3, {
-            "type": "section",
-            "text": {
-                "type": "mrkdwn",
-                "text": f"*AI Reasoning:*\n_{order['reasoning'][:500]}..._" if len(order.get('reasoning', '')) > 500 else f"*AI Reasoning:*\n_{order['reasoning']}_"
-            }
-        })
+    # Build the blocks of this order's layout
+    style = (emoji, status_text)
+    layout = _SLACK_LAYOUTS[(bool(order.get("reasoning")), confidence < 0.6)]
     
-    # Add action buttons for low confidence orders
-    if confidence < 0.6:
-        message["attachments"][0]["blocks"].append({
-            "type": "actions",
-            "elements": [
-                {
-                    "type": "button",
-                    "text": {"type": "plain_text", "text": "✅ Approve"},
-                    "style": "primary",
-                    "value": order.get("order_id", "")
-                },
-                {
-                    "type": "button",
-                    "text": {"type": "plain_text", "text": "❌ Reject"},
-                    "style": "danger",
-                    "value": order.get("order_id", "")
-                }
-            ]
-        })
+    message = dict(_SLACK_SKELETON)
+    message["channel"] = channel
+    message["attachments"] = [{"color": color, "blocks": [build(order, style) for build in layout]}]
     
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                webhook_url,
-                json=message,
-                timeout=10.0
-            )
-            
-            if response.status_code == 200:
-                logger.info(f"Slack notification sent for order {order.get('order_id')}")
-                return True
-            else:
-                logger.error(f"Slack notification failed: {response.status_code} - {response.text}")
-                return False
+        response = await _post_slack(webhook_url, message)
+        
+        if response.status_code == 200:
+            logger.info(f"Slack notification sent for order {order.get('order_id')}")
+            return True
+        else:
+            logger.error(f"Slack notification failed: {response.status_code} - {response.text}")
+            return False
                 
     except Exception as e:
         logger.error(f"Failed to send Slack notification: {str(e)}")
@@ -188,20 +253,20 @@ async def send_webhook_callback(
         }
     
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                callback_url,
-                json=payload,
-                timeout=30.0,
-                headers={"Content-Type": "application/json"}
-            )
-            
-            if response.status_code in [200, 201, 202, 204]:
-                logger.info(f"Webhook callback sent to {callback_url}")
-                return True
-            else:
-                logger.warning(f"Webhook callback returned {response.status_code}")
-                return False
+        client = await _get_http_client()
+        response = await client.post(
+            callback_url,
+            content=dumps(payload),
+            timeout=30.0,
+            headers=JSON_HEADERS
+        )
+        
+        if response.status_code in [200, 201, 202, 204]:
+            logger.info(f"Webhook callback sent to {callback_url}")
+            return True
+        else:
+            logger.warning(f"Webhook callback returned {response.status_code}")
+            return False
                 
     except Exception as e:
         logger.error(f"Webhook callback failed: {str(e)}")
@@ -222,7 +287,7 @@ async def send_email_notification(
     Returns:
         bool: True if sent successfully
     """
-    recipient = recipient or os.getenv("NOTIFICATION_EMAIL")
+    recipient = recipient or NOTIFICATION_EMAIL
     
     if not recipient:
         logger.debug("No email recipient configured, skipping email notification")
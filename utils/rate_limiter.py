@@ -6,11 +6,21 @@ from slowapi.errors import RateLimitExceeded
 from fastapi import Request
 from fastapi.responses import JSONResponse
 import logging
+import os
 
 logger = logging.getLogger(__name__)
 
+# Rate limit counters are shared through Redis when configured, so limits hold
+# across workers/replicas; falls back to per-process memory if Redis is down
+RATE_LIMIT_STORAGE_URI = os.getenv("REDIS_URL", "memory://")
+
 # Create limiter instance
-limiter = Limiter(key_func=get_remote_address)
+limiter = Limiter(
+    key_func=get_remote_address,
+    storage_uri=RATE_LIMIT_STORAGE_URI,
+    strategy="moving-window",
+    in_memory_fallback_enabled=True
+)
 
 async def rate_limit_exceeded_handler(request: Request, exc: RateLimitExceeded):
     """Handle rate limit exceeded errors."""
@@ -7,6 +7,8 @@ from tenacity import (
     retry_if_exception_type
 )
 from functools import wraps
+import httpx
+from pymongo.errors import AutoReconnect, ConnectionFailure, NetworkTimeout
 
 
 # Common retry decorator for LLM calls
@@ -34,3 +36,36 @@ def retry_data_load(func):
         stop=stop_after_attempt(2),
         wait=wait_exponential(multiplier=0.5, min=1, max=3)
     )(func)
+
+
+# Retry decorator for MongoDB writes
+def retry_mongo_write(func):
+    """
+    Retry decorator for MongoDB write operations.
+    
+    Retries up to 3 times with short backoff on transient network errors;
+    the last error is re-raised for the caller to handle.
+    """
+    return retry(
+        stop=stop_after_attempt(3),
+        wait=wait_exponential(multiplier=0.25, min=0.25, max=2),
+        retry=retry_if_exception_type((ConnectionFailure, AutoReconnect, NetworkTimeout)),
+        reraise=True
+    )(func)
+
+
+# Retry decorator for outbound HTTP notifications
+def retry_http_post(func):
+    """
+    Retry decorator for notification HTTP posts (Slack, Telegram).
+    
+    Retries up to 3 times with short backoff, only when the connection
+    couldn't be established (the request was never sent, so a retry can't
+    duplicate an alert); the last error is re-raised for the caller to handle.
+    """
+    return retry(
+        stop=stop_after_attempt(3),
+        wait=wait_exponential(multiplier=0.25, min=0.25, max=2),
+        retry=retry_if_exception_type((ConnectionError, httpx.ConnectError, httpx.ConnectTimeout)),
+        reraise=True
+    )(func)
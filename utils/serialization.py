@@ -0,0 +1,64 @@
+"""JSON serialization helpers (orjson when available, stdlib json otherwise)."""
+
+import json
+from datetime import date, datetime
+from typing import Any
+
+from bson import ObjectId
+from starlette.responses import Response
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# Content-Type header for requests sent with a pre-serialized JSON body
+JSON_HEADERS = {"Content-Type": "application/json"}
+
+
+def _default(obj: Any) -> Any:
+    """Encode types the JSON encoders don't handle natively (MongoDB documents)."""
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(obj: Any) -> bytes:
+    """
+    Serialize an object to UTF-8 JSON bytes.
+    
+    Uses orjson (C-level encoder, also handles NumPy scalars from the
+    safety calculations) and falls back to the stdlib json module.
+    """
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj, default=_default, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(obj, ensure_ascii=False, default=_default).encode("utf-8")
+
+
+def loads(data: Any) -> Any:
+    """Parse JSON from bytes or str."""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+class ORJSONResponse(Response):
+    """
+    JSON response rendered in one encoder call.
+    
+    Accepts raw MongoDB documents (ObjectId, naive UTC datetimes) so routes
+    can return them without converting fields in Python first.
+    """
+    media_type = "application/json"
+    
+    def render(self, content: Any) -> bytes:
+        if ORJSON_AVAILABLE:
+            return orjson.dumps(
+                content,
+                default=_default,
+                option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NAIVE_UTC
+            )
+        return dumps(content)
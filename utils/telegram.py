@@ -8,22 +8,100 @@ Features:
 """
 
 import os
+import html
+import time
 import httpx
 import asyncio
 import json
 from pathlib import Path
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Callable, Awaitable
 import structlog
 from datetime import datetime
 
+from utils.serialization import dumps, loads, JSON_HEADERS
+from utils.retry import retry_http_post
+from utils.notifications import truncate
+from utils.mongodb import get_db, save_telegram_subscriber, get_telegram_subscriber_ids
+
 logger = structlog.get_logger()
 
 # Telegram Bot Configuration
 TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
 TELEGRAM_CHAT_ID = os.getenv("TELEGRAM_CHAT_ID")
 TELEGRAM_API_BASE = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}" if TELEGRAM_BOT_TOKEN else None
+_SEND_URL = f"{TELEGRAM_API_BASE}/sendMessage" if TELEGRAM_API_BASE else None
+_BOT_CONFIGURED = bool(TELEGRAM_BOT_TOKEN)
 DASHBOARD_URL = os.getenv("DASHBOARD_URL", "http://localhost:8000")
 
+try:
+    import h2  # noqa: F401 - enables HTTP/2 support in httpx
+    HTTP2_ENABLED = True
+except ImportError:
+    HTTP2_ENABLED = False
+
+# Message templates (plain text - no parse_mode, so no escaping needed)
+_ORDER_ALERT_TEMPLATE = """{status_emoji} Inventory Order Alert
+
+📦 Material: {product_id}
+📊 Units Needed: {quantity:,}
+{conf_emoji} Confidence: {confidence_pct}%
+📋 Status: {status}
+
+💰 Est. Cost: ${estimated_cost:,.2f}
+📉 Shortage: {shortage:,.0f} units
+🎯 Reorder Point: {reorder_point:,.0f}
+
+📝 AI Reasoning:
+{reasoning}
+
+🕐 Order ID: {order_id}
+"""
+
+_LOW_CONFIDENCE_TEMPLATE = """🚨 APPROVAL REQUIRED
+
+📦 Material: {product_id}
+📊 Quantity: {quantity:,} units
+🔴 Confidence: {confidence_pct}% (Below threshold)
+
+💰 Est. Cost: ${estimated_cost:,.2f}
+
+📝 AI Reasoning:
+{reasoning}
+
+⚠️ This order requires manual approval due to low AI confidence.
+
+🆔 Order: {order_id}
+"""
+
+_BATCH_HEADER_TEMPLATE = "📦 {count} Inventory Orders\n"
+_BATCH_LINE_TEMPLATE = "{status_emoji} {conf_emoji} {product_id}: {quantity:,} units ({confidence_pct}%) - {status}\n   🕐 {order_id}"
+
+# Confidence emoji indexed by int(confidence * 10): <60% red, 60-79% yellow, 80%+ green
+_CONF_EMOJI = ("🔴",) * 6 + ("🟡",) * 2 + ("🟢",) * 3
+_STATUS_EMOJI = {"executed": "✅"}
+
+# Outbound throttling: Telegram allows ~30 messages/sec per bot and about
+# one message/sec per chat. Every send reserves the next free slot for its
+# chat and then for the bot, so bursts are queued instead of rejected.
+TELEGRAM_MAX_CONCURRENCY = 25
+TELEGRAM_MAX_PER_SECOND = 25
+PER_CHAT_INTERVAL = 1.0  # seconds between messages to the same chat
+BROADCAST_CHUNK_SIZE = 25
+_send_semaphore = asyncio.Semaphore(TELEGRAM_MAX_CONCURRENCY)
+_next_global_slot = 0.0
+_next_chat_slot: Dict[str, float] = {}
+# Chats whose slot has passed are dropped from _next_chat_slot (at most once
+# per CHAT_SLOT_PRUNE_INTERVAL) so it only holds recently messaged chats
+CHAT_SLOT_PRUNE_INTERVAL = 60.0  # seconds
+_next_slot_prune = 0.0
+
+# Order notifications arriving within BATCH_WINDOW are coalesced into one message
+BATCH_WINDOW = 2.0  # seconds
+BATCH_MAX_ORDERS = 20  # keeps a batch well under Telegram's 4096-char message limit
+
+# Shared HTTP client for the Bot API (keeps the TLS connection alive)
+_http_client: Optional[httpx.AsyncClient] = None
+
 # Persistent storage for registered chat IDs
 REGISTERED_CHATS_FILE = Path("data/telegram_users.json")
 
@@ -49,55 +127,112 @@ def _save_registered_chats(chats: Dict[str, Dict[str, Any]]):
 # Load registered chats on module load
 registered_chats: Dict[str, Dict[str, Any]] = _load_registered_chats()
 
+# Subscribers shared across workers live in MongoDB (when configured);
+# the ID list is cached in-process as (expires_at, chat_ids)
+SUBSCRIBER_CACHE_TTL = 30.0  # seconds
+_subscriber_cache: Optional[tuple] = None
+
+
+async def _get_recipients() -> List[str]:
+    """
+    Chat IDs to broadcast to.
+    
+    MongoDB subscribers (cached for SUBSCRIBER_CACHE_TTL) plus chats
+    registered with this process, falling back to TELEGRAM_CHAT_ID.
+    """
+    global _subscriber_cache
+    
+    recipients = list(registered_chats)
+    
+    if get_db() is not None:
+        now = time.monotonic()
+        if _subscriber_cache is None or _subscriber_cache[0] <= now:
+            _subscriber_cache = (now + SUBSCRIBER_CACHE_TTL, await get_telegram_subscriber_ids())
+        recipients += [chat_id for chat_id in _subscriber_cache[1] if chat_id not in registered_chats]
+    
+    if not recipients and TELEGRAM_CHAT_ID:
+        recipients = [TELEGRAM_CHAT_ID]
+    return recipients
+
+
+# ==================== HTTP Client ====================
+
+async def init_http():
+    """Create the shared Bot API client (call on application startup)."""
+    global _http_client
+    
+    if _http_client is None:
+        _http_client = httpx.AsyncClient(
+            http2=HTTP2_ENABLED,
+            limits=httpx.Limits(max_keepalive_connections=20, max_connections=100),
+            timeout=10.0
+        )
+
+
+async def close_http():
+    """Close the shared Bot API client (call on application shutdown)."""
+    global _http_client
+    
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+
+async def _get_http_client() -> httpx.AsyncClient:
+    """Return the shared Bot API client, creating it if startup didn't."""
+    if _http_client is None:
+        await init_http()
+    return _http_client
+
 
 # ==================== Outbound Notifications ====================
 
+def _conf_emoji(confidence: float) -> str:
+    """Traffic-light emoji for a 0-1 confidence score."""
+    return _CONF_EMOJI[min(max(int(confidence * 10), 0), 10)]
+
+
+def _build_order_message(order_data: Dict[str, Any]) -> str:
+    """Render the order alert text for an order."""
+    confidence = order_data.get("confidence", 0)
+    status = order_data.get("status", "unknown")
+    
+    return _ORDER_ALERT_TEMPLATE.format(
+        status_emoji=_STATUS_EMOJI.get(status, "⏳"),
+        conf_emoji=_conf_emoji(confidence),
+        product_id=order_data.get('product_id', 'Unknown'),
+        quantity=order_data.get('quantity', 0),
+        confidence_pct=int(confidence * 100),
+        status=status.upper(),
+        estimated_cost=order_data.get('estimated_cost', 0),
+        shortage=order_data.get('shortage', 0),
+        reorder_point=order_data.get('reorder_point', 0),
+        reasoning=truncate(order_data.get('reasoning', 'No details provided'), 200),
+        order_id=order_data.get('order_id', 'N/A')[:25]
+    )
+
+
 async def send_telegram_notification(order_data: Dict[str, Any]) -> bool:
     """
     Send order notification to ALL registered Telegram users.
     No .env editing needed - users just scan QR and start bot.
     """
-    if not TELEGRAM_BOT_TOKEN:
+    if not _BOT_CONFIGURED:
         logger.warning("Telegram bot token not configured - skipping notification")
         return False
     
-    # If no users registered yet, check if fallback TELEGRAM_CHAT_ID is set
-    if not registered_chats and not TELEGRAM_CHAT_ID:
+    # If no users registered yet, falls back to TELEGRAM_CHAT_ID (if set)
+    recipients = await _get_recipients()
+    if not recipients:
         logger.warning("No Telegram users registered yet")
         return False
     
     try:
-        confidence = order_data.get("confidence", 0)
-        status = order_data.get("status", "unknown")
-        
-        # Confidence indicator  
-        conf_emoji = "🟢" if confidence >= 0.8 else ("🟡" if confidence >= 0.6 else "🔴")
-        status_emoji = "✅" if status == "executed" else "⏳"
-        
-        # Get reasoning (plain text, no special escaping needed)
-        reasoning = order_data.get('reasoning', 'No details provided')[:200]
-        
-        # Plain text message (no Markdown formatting to avoid parsing issues)
-        message = f"""{status_emoji} Inventory Order Alert
-
-📦 Material: {order_data.get('product_id', 'Unknown')}
-📊 Units Needed: {order_data.get('quantity', 0):,}
-{conf_emoji} Confidence: {int(confidence * 100)}%
-📋 Status: {status.upper()}
-
-💰 Est. Cost: ${order_data.get('estimated_cost', 0):,.2f}
-📉 Shortage: {order_data.get('shortage', 0):,.0f} units
-🎯 Reorder Point: {order_data.get('reorder_point', 0):,.0f}
-
-📝 AI Reasoning:
-{reasoning}
-
-🕐 Order ID: {order_data.get('order_id', 'N/A')[:25]}
-"""
+        message = _build_order_message(order_data)
         
         # Add inline keyboard for pending orders
         keyboard = None
-        if status == "pending":
+        if order_data.get("status", "unknown") == "pending":
             order_id = order_data.get('order_id', '')[:50]
             keyboard = {
                 "inline_keyboard": [[
@@ -107,12 +242,7 @@ async def send_telegram_notification(order_data: Dict[str, Any]) -> bool:
             }
         
         # Broadcast to all registered users
-        success_count = 0
-        recipients = list(registered_chats.keys()) if registered_chats else [TELEGRAM_CHAT_ID]
-        
-        for chat_id in recipients:
-            if await _send_message(chat_id, message, keyboard):
-                success_count += 1
+        success_count = await _broadcast(recipients, message, keyboard)
         
         logger.info(f"Telegram notification sent to {success_count}/{len(recipients)} users")
         return success_count > 0
@@ -126,30 +256,24 @@ async def send_telegram_low_confidence_alert(order_data: Dict[str, Any]) -> bool
     """
     Send low-confidence order alert to ALL registered users requiring approval.
     """
-    if not TELEGRAM_BOT_TOKEN:
+    if not _BOT_CONFIGURED:
         return False
     
-    if not registered_chats and not TELEGRAM_CHAT_ID:
+    recipients = await _get_recipients()
+    if not recipients:
         logger.warning("No Telegram users registered yet")
         return False
     
     try:
         order_id = order_data.get('order_id', 'unknown')[:50]
-        message = f"""🚨 APPROVAL REQUIRED
-
-📦 Material: {order_data.get('product_id', 'Unknown')}
-📊 Quantity: {order_data.get('quantity', 0):,} units
-🔴 Confidence: {int(order_data.get('confidence', 0) * 100)}% (Below threshold)
-
-💰 Est. Cost: ${order_data.get('estimated_cost', 0):,.2f}
-
-📝 AI Reasoning:
-{order_data.get('reasoning', 'No reasoning')[:150]}
-
-⚠️ This order requires manual approval due to low AI confidence.
-
-🆔 Order: {order_id}
-"""
+        message = _LOW_CONFIDENCE_TEMPLATE.format(
+            product_id=order_data.get('product_id', 'Unknown'),
+            quantity=order_data.get('quantity', 0),
+            confidence_pct=int(order_data.get('confidence', 0) * 100),
+            estimated_cost=order_data.get('estimated_cost', 0),
+            reasoning=truncate(order_data.get('reasoning', 'No reasoning'), 150),
+            order_id=order_id
+        )
         
         keyboard = {
             "inline_keyboard": [[
@@ -161,12 +285,7 @@ async def send_telegram_low_confidence_alert(order_data: Dict[str, Any]) -> bool
         }
         
         # Broadcast to all registered users
-        success_count = 0
-        recipients = list(registered_chats.keys()) if registered_chats else [TELEGRAM_CHAT_ID]
-        
-        for chat_id in recipients:
-            if await _send_message(chat_id, message, keyboard):
-                success_count += 1
+        success_count = await _broadcast(recipients, message, keyboard)
         
         logger.info(f"Low-confidence alert sent to {success_count}/{len(recipients)} users")
         return success_count > 0
@@ -176,23 +295,262 @@ async def send_telegram_low_confidence_alert(order_data: Dict[str, Any]) -> bool
         return False
 
 
-async def _send_message(chat_id: str, text: str, reply_markup: Dict = None) -> bool:
-    """Helper to send Telegram message."""
-    if not TELEGRAM_API_BASE:
+async def send_telegram_batch(orders: List[Dict[str, Any]]) -> bool:
+    """
+    Send several order notifications as one message to ALL registered users.
+    
+    A single order is sent as a regular order notification.
+    """
+    if len(orders) == 1:
+        return await send_telegram_notification(orders[0])
+    
+    if not _BOT_CONFIGURED:
+        logger.warning("Telegram bot token not configured - skipping notification")
+        return False
+    
+    recipients = await _get_recipients()
+    if not recipients:
+        logger.warning("No Telegram users registered yet")
         return False
+    
+    try:
+        lines = [_BATCH_HEADER_TEMPLATE.format(count=len(orders))]
+        buttons = []
+        for order_data in orders:
+            confidence = order_data.get("confidence", 0)
+            status = order_data.get("status", "unknown")
+            lines.append(_BATCH_LINE_TEMPLATE.format(
+                status_emoji=_STATUS_EMOJI.get(status, "⏳"),
+                conf_emoji=_conf_emoji(confidence),
+                product_id=order_data.get('product_id', 'Unknown'),
+                quantity=order_data.get('quantity', 0),
+                confidence_pct=int(confidence * 100),
+                status=status.upper(),
+                order_id=order_data.get('order_id', 'N/A')[:25]
+            ))
+            
+            # Approve/Reject row per pending order
+            if status == "pending":
+                order_id = order_data.get('order_id', '')[:50]
+                buttons.append([
+                    {"text": f"✅ {order_data.get('product_id', order_id)}", "callback_data": f"approve_{order_id}"},
+                    {"text": "❌ Reject", "callback_data": f"reject_{order_id}"}
+                ])
         
-    payload = {
-        "chat_id": chat_id,
-        "text": text
-        # Removed parse_mode: Markdown to avoid 400 errors with special characters
-    }
+        keyboard = {"inline_keyboard": buttons} if buttons else None
+        success_count = await _broadcast(recipients, "\n".join(lines), keyboard)
+        
+        logger.info(f"Telegram batch of {len(orders)} orders sent to {success_count}/{len(recipients)} users")
+        return success_count > 0
+        
+    except Exception as e:
+        logger.error("Failed to send Telegram batch notification", error=str(e))
+        return False
+
+
+class TelegramBatcher:
+    """
+    Coalesce order notifications that arrive close together.
+    
+    The first enqueued order starts a BATCH_WINDOW timer; everything queued
+    until it fires goes out as one message. Critical orders (low-confidence
+    alerts that need approval) skip the queue and are sent immediately.
+    """
+    
+    def __init__(self, window: float = BATCH_WINDOW, max_orders: int = BATCH_MAX_ORDERS):
+        self.window = window
+        self.max_orders = max_orders
+        self._queue: List[Dict[str, Any]] = []
+        self._flush_task: Optional[asyncio.Task] = None
+    
+    def enqueue(self, order_data: Dict[str, Any], critical: bool = False) -> Optional[asyncio.Task]:
+        """
+        Queue an order notification, or send it right away if critical.
+        
+        Args:
+            order_data: Order details
+            critical: Send as a standalone low-confidence alert, skipping the batch
+            
+        Returns:
+            The send task for critical alerts, None for queued orders
+        """
+        if critical:
+            return _schedule(send_telegram_low_confidence_alert(order_data))
+        
+        self._queue.append(order_data)
+        if len(self._queue) >= self.max_orders:
+            self._cancel_timer()
+            orders, self._queue = self._queue, []
+            _schedule(send_telegram_batch(orders))
+        elif self._flush_task is None:
+            self._flush_task = _schedule(self._flush_later())
+        return None
+    
+    async def force_flush(self):
+        """Send whatever is queued now (call on application shutdown)."""
+        self._cancel_timer()
+        await self._flush()
+    
+    def _cancel_timer(self):
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            self._flush_task = None
+    
+    async def _flush_later(self):
+        await asyncio.sleep(self.window)
+        self._flush_task = None
+        await self._flush()
+    
+    async def _flush(self) -> bool:
+        orders, self._queue = self._queue, []
+        if not orders:
+            return False
+        return await send_telegram_batch(orders)
+
+
+# ==================== Background Dispatch ====================
+
+# Strong references to in-flight notification tasks (the event loop only
+# keeps weak ones, so unreferenced tasks can be garbage collected mid-send)
+_pending: set = set()
+
+
+def _schedule(coro: Awaitable[bool]) -> asyncio.Task:
+    """Run a notification coroutine in the background and track it."""
+    task = asyncio.create_task(coro)
+    _pending.add(task)
+    task.add_done_callback(_pending.discard)
+    return task
+
+
+batcher = TelegramBatcher()
+
+
+def schedule_telegram_notification(order_data: Dict[str, Any]):
+    """Queue an order notification; sent with others from the same batch window."""
+    batcher.enqueue(order_data)
+
+
+def schedule_telegram_low_confidence_alert(order_data: Dict[str, Any]) -> asyncio.Task:
+    """Send a low-confidence alert right away (not batched), in the background."""
+    return batcher.enqueue(order_data, critical=True)
+
+
+async def drain_pending(timeout: float = 10.0):
+    """
+    Wait for in-flight notifications to finish (call on application shutdown).
+    
+    Args:
+        timeout: Seconds to wait before cancelling whatever is still running
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    
+    # The final batch send counts against the same shutdown budget
+    try:
+        await asyncio.wait_for(batcher.force_flush(), timeout)
+    except asyncio.TimeoutError:
+        logger.warning("Telegram batch flush timed out at shutdown")
+    if not _pending:
+        return
+    
+    _, not_done = await asyncio.wait(set(_pending), timeout=max(0.0, deadline - loop.time()))
+    for task in not_done:
+        task.cancel()
+    if not_done:
+        logger.warning(f"Cancelled {len(not_done)} Telegram notifications still pending at shutdown")
+
+
+async def _broadcast(recipients: List[str], text: str, reply_markup: Dict = None) -> int:
+    """
+    Send the same message to all recipients; return success count.
     
+    Recipients are sent to concurrently in chunks of BROADCAST_CHUNK_SIZE;
+    _send_message paces the actual requests to Telegram's rate limits.
+    """
+    results = []
+    for start in range(0, len(recipients), BROADCAST_CHUNK_SIZE):
+        chunk = recipients[start:start + BROADCAST_CHUNK_SIZE]
+        results += await asyncio.gather(
+            *[_send_message(chat_id, text, reply_markup) for chat_id in chunk],
+            return_exceptions=True
+        )
+    for chat_id, result in zip(recipients, results):
+        if isinstance(result, Exception):
+            logger.warning("Telegram send failed", chat_id=chat_id, error=str(result))
+    return sum(1 for result in results if result is True)
+
+
+@retry_http_post
+async def _send_message(
+    chat_id: str,
+    text: str,
+    reply_markup: Dict = None,
+    parse_mode: Optional[str] = None
+) -> bool:
+    """
+    Helper to send Telegram message.
+    
+    Alerts go out as plain text. Command replies use parse_mode="HTML"; any
+    dynamic text in them must be passed through html.escape first.
+    """
+    if not _BOT_CONFIGURED:
+        return False
+        
+    payload = {"chat_id": chat_id, "text": text}
     if reply_markup:
         payload["reply_markup"] = reply_markup
+    if parse_mode:
+        payload["parse_mode"] = parse_mode
     
-    async with httpx.AsyncClient() as client:
-        response = await client.post(f"{TELEGRAM_API_BASE}/sendMessage", json=payload, timeout=10)
-        return response.status_code == 200
+    client = await _get_http_client()
+    body = dumps(payload)
+    for attempt in range(2):
+        await _wait_for_send_slot(chat_id)
+        async with _send_semaphore:
+            response = await client.post(
+                _SEND_URL,
+                content=body,
+                headers=JSON_HEADERS,
+                timeout=10
+            )
+        if response.status_code != 429 or attempt:
+            break
+        # Rate limited: wait as long as Telegram asks, then retry once
+        retry_after = _retry_after(response)
+        logger.warning("Telegram rate limit hit", chat_id=chat_id, retry_after=retry_after)
+        await asyncio.sleep(retry_after)
+    return response.status_code == 200
+
+
+async def _wait_for_send_slot(chat_id: str):
+    """Sleep until both the chat and the bot-wide send rate allow a message."""
+    global _next_global_slot, _next_slot_prune
+    
+    now = time.monotonic()
+    if now >= _next_slot_prune:
+        _next_slot_prune = now + CHAT_SLOT_PRUNE_INTERVAL
+        for stale in [chat for chat, slot in _next_chat_slot.items() if slot <= now]:
+            del _next_chat_slot[stale]
+    
+    slot = max(now, _next_chat_slot.get(chat_id, 0.0))
+    _next_chat_slot[chat_id] = slot + PER_CHAT_INTERVAL
+    if slot > now:
+        await asyncio.sleep(slot - now)
+    
+    now = time.monotonic()
+    slot = max(now, _next_global_slot)
+    _next_global_slot = slot + 1 / TELEGRAM_MAX_PER_SECOND
+    if slot > now:
+        await asyncio.sleep(slot - now)
+
+
+def _retry_after(response: httpx.Response) -> float:
+    """Seconds to back off after a 429, from the Bot API error parameters."""
+    try:
+        return float(loads(response.content)["parameters"]["retry_after"])
+    except (ValueError, KeyError, TypeError):
+        return 1.0
 
 
 # ==================== Inbound Webhook Handler ====================
@@ -217,21 +575,12 @@ async def handle_telegram_update(update: Dict[str, Any]) -> Dict[str, Any]:
         if not text or not chat_id:
             return {"status": "ignored", "reason": "no text or chat_id"}
         
-        # Route commands
-        if text.startswith("/start"):
-            return await _handle_start(chat_id, user_name)
-        elif text.startswith("/status"):
-            return await _handle_status(chat_id)
-        elif text.startswith("/approve"):
-            order_id = text.replace("/approve", "").strip()
-            return await _handle_approve(chat_id, order_id)
-        elif text.startswith("/reject"):
-            order_id = text.replace("/reject", "").strip()
-            return await _handle_reject(chat_id, order_id)
-        elif text.startswith("/help"):
-            return await _handle_help(chat_id)
-        else:
-            return await _handle_unknown(chat_id, text)
+        # Route commands ("/cmd@BotName args" in group chats)
+        command, _, args = text.partition(" ")
+        handler = _COMMANDS.get(command.split("@", 1)[0])
+        if handler:
+            return await handler(chat_id, args.strip(), user_name)
+        return await _handle_unknown(chat_id, text)
             
     except Exception as e:
         logger.error("Error handling Telegram update", error=str(e))
@@ -244,29 +593,32 @@ async def _handle_start(chat_id: str, user_name: str) -> Dict[str, Any]:
         "registered_at": datetime.now().isoformat(),
         "user_name": user_name
     }
-    # Persist to file immediately
+    # Persist to file immediately, and to MongoDB so other workers see it
     _save_registered_chats(registered_chats)
+    global _subscriber_cache
+    if await save_telegram_subscriber(chat_id, user_name):
+        _subscriber_cache = None
     
     message = f"""
-👋 *Welcome, {user_name}!*
+👋 <b>Welcome, {html.escape(user_name)}!</b>
 
 You're now registered for Inventory Agent notifications!
 
-✅ *Auto-Registered* - No configuration needed
-🔔 *Your Chat ID:* `{chat_id}`
+✅ <b>Auto-Registered</b> - No configuration needed
+🔔 <b>Your Chat ID:</b> <code>{html.escape(chat_id)}</code>
 
-*Available Commands:*
+<b>Available Commands:</b>
 • /status - View current inventory status
-• /approve `<order_id>` - Approve pending order
-• /reject `<order_id>` - Reject pending order
+• /approve <code>&lt;order_id&gt;</code> - Approve pending order
+• /reject <code>&lt;order_id&gt;</code> - Reject pending order
 • /help - Show this help
 
-📊 *Dashboard:* {DASHBOARD_URL}/dashboard
+📊 <b>Dashboard:</b> {DASHBOARD_URL}/dashboard
 
 🎉 You'll now receive all inventory alerts automatically!
 """
     
-    await _send_message(chat_id, message)
+    await _send_message(chat_id, message, parse_mode="HTML")
     logger.info(f"New user registered: {user_name} (chat_id: {chat_id})")
     return {"status": "registered", "chat_id": chat_id}
 
@@ -274,62 +626,64 @@ You're now registered for Inventory Agent notifications!
 async def _handle_status(chat_id: str) -> Dict[str, Any]:
     """Handle /status command - show pending orders."""
     message = f"""
-📊 *Inventory Agent Status*
+📊 <b>Inventory Agent Status</b>
 
 🟢 Service: Running
 📦 Mode: Mock Data
 🔗 Dashboard: {DASHBOARD_URL}/dashboard
 
 To check pending orders, visit the dashboard or use:
-`POST /orders?status=pending`
+<code>POST /orders?status=pending</code>
 """
     
-    await _send_message(chat_id, message)
+    await _send_message(chat_id, message, parse_mode="HTML")
     return {"status": "status_sent"}
 
 
 async def _handle_approve(chat_id: str, order_id: str) -> Dict[str, Any]:
     """Handle /approve command."""
     if not order_id:
-        await _send_message(chat_id, "❌ Usage: `/approve <order_id>`")
+        await _send_message(chat_id, "❌ Usage: <code>/approve &lt;order_id&gt;</code>", parse_mode="HTML")
         return {"status": "error", "reason": "no order_id"}
     
     # In production, this would call the database to update order status
+    safe_order_id = html.escape(order_id)
     message = f"""
-✅ *Order Approved*
+✅ <b>Order Approved</b>
 
-Order `{order_id}` has been marked for approval.
+Order <code>{safe_order_id}</code> has been marked for approval.
 
-⚠️ *Note:* Full approval requires API call:
-```
-PATCH /orders/{order_id}/status
+⚠️ <b>Note:</b> Full approval requires API call:
+<pre>
+PATCH /orders/{safe_order_id}/status
 {{"status": "executed"}}
-```
+</pre>
 """
     
-    await _send_message(chat_id, message)
+    await _send_message(chat_id, message, parse_mode="HTML")
     return {"status": "approved", "order_id": order_id}
 
 
 async def _handle_reject(chat_id: str, order_id: str) -> Dict[str, Any]:
     """Handle /reject command."""
     if not order_id:
-        await _send_message(chat_id, "❌ Usage: `/reject <order_id>`")
+        await _send_message(chat_id, "❌ Usage: <code>/reject &lt;order_id&gt;</code>", parse_mode="HTML")
         return {"status": "error", "reason": "no order_id"}
     
+    safe_order_id = html.escape(order_id)
     message = f"""
-❌ *Order Rejected*
+❌ <b>Order Rejected</b>
 
-Order `{order_id}` has been marked for rejection.
+Order <code>{safe_order_id}</code> has been marked for rejection.
 
-⚠️ *Note:* Full rejection requires API call:
-```
-PATCH /orders/{order_id}/status
+⚠️ <b>Note:</b> Full rejection requires API call:
+<pre>
+PATCH /orders/{safe_order_id}/status
 {{"status": "rejected"}}
-```
+</pre>
 """
     
-    await _send_message(chat_id, message)
+    await _send_message(chat_id, message, parse_mode="HTML")
     return {"status": "rejected", "order_id": order_id}
 
 
@@ -372,25 +726,25 @@ async def _handle_callback(callback: Dict[str, Any]) -> Dict[str, Any]:
 async def _handle_help(chat_id: str) -> Dict[str, Any]:
     """Handle /help command."""
     message = f"""
-🤖 *Inventory Agent Bot*
+🤖 <b>Inventory Agent Bot</b>
 
-*Commands:*
+<b>Commands:</b>
 • /start - Register for notifications
 • /status - View service status
-• /approve `<id>` - Approve order
-• /reject `<id>` - Reject order
+• /approve <code>&lt;id&gt;</code> - Approve order
+• /reject <code>&lt;id&gt;</code> - Reject order
 • /help - Show this help
 
-*Notifications:*
+<b>Notifications:</b>
 • 🟢 High confidence orders auto-execute
 • 🟡 Medium confidence require review
 • 🔴 Low confidence need approval
 
-*Dashboard:*
+<b>Dashboard:</b>
 {DASHBOARD_URL}/dashboard
 """
     
-    await _send_message(chat_id, message)
+    await _send_message(chat_id, message, parse_mode="HTML")
     return {"status": "help_sent"}
 
 
@@ -400,10 +754,20 @@ async def _handle_unknown(chat_id: str, text: str) -> Dict[str, Any]:
     return {"status": "unknown_command"}
 
 
+# Command dispatch table: handler(chat_id, args, user_name)
+_COMMANDS: Dict[str, Callable[[str, str, str], Awaitable[Dict[str, Any]]]] = {
+    "/start": lambda chat_id, args, user_name: _handle_start(chat_id, user_name),
+    "/status": lambda chat_id, args, user_name: _handle_status(chat_id),
+    "/approve": lambda chat_id, args, user_name: _handle_approve(chat_id, args),
+    "/reject": lambda chat_id, args, user_name: _handle_reject(chat_id, args),
+    "/help": lambda chat_id, args, user_name: _handle_help(chat_id),
+}
+
+
 # ==================== Setup Info ====================
 
-def get_telegram_setup_info() -> Dict[str, Any]:
-    """Return setup information for Telegram integration."""
+def _build_setup_info() -> Dict[str, Any]:
+    """Build the static part of the setup info from the current environment."""
     bot_username = os.getenv("TELEGRAM_BOT_USERNAME", "InventoryAgentBot")
     
     return {
@@ -411,8 +775,8 @@ def get_telegram_setup_info() -> Dict[str, Any]:
         "bot_link": f"https://t.me/{bot_username}",
         "qr_url": f"https://api.qrserver.com/v1/create-qr-code/?size=200x200&data=https://t.me/{bot_username}",
         "webhook_url": "/telegram/webhook",
-        "registered_chats": len(registered_chats),
-        "commands": ["/start", "/status", "/approve", "/reject", "/help"],
+        "registered_chats": 0,
+        "commands": list(_COMMANDS),
         "setup_instructions": [
             f"1. Open Telegram and search for @{bot_username}",
             "2. Click 'Start' to activate the bot",
@@ -422,3 +786,19 @@ def get_telegram_setup_info() -> Dict[str, Any]:
         ]
     }
 
+
+# Setup info is fixed at import time (like the bot token/chat ID above), so
+# .env changes need a restart; only the registered chat count is live
+_SETUP_INFO: Dict[str, Any] = _build_setup_info()
+
+
+def reload_setup_info() -> None:
+    """Rebuild the cached setup info from the environment (for tests)."""
+    global _SETUP_INFO
+    _SETUP_INFO = _build_setup_info()
+
+
+def get_telegram_setup_info() -> Dict[str, Any]:
+    """Return setup information for Telegram integration."""
+    return {**_SETUP_INFO, "registered_chats": len(registered_chats)}
+
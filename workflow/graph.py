@@ -9,19 +9,45 @@ per PS.md requirements:
 """
 
 from langgraph.graph import StateGraph, END
+from langgraph.types import Command
+from contextlib import AsyncExitStack
 from datetime import datetime
+from functools import lru_cache
+from pathlib import Path
+import asyncio
+import inspect
+import logging
+import os
 import uuid
+from typing import List, Optional
 
 from .nodes import (
     InventoryState,
     data_loader_node,
     safety_calculator_node,
+    llm_context_node,
     reasoning_node,
-    action_generator_node,
-    route_on_error,
-    route_by_confidence
+    action_generator_node
 )
 
+logger = logging.getLogger(__name__)
+
+# Checkpointing (resumable runs) for non-mock analyses:
+#   none   - no persistence (default)
+#   sqlite - AsyncSqliteSaver at INVENTORY_CHECKPOINT_PATH, opened on
+#            application startup (needs the optional
+#            langgraph-checkpoint-sqlite package)
+# A checkpointer writes after every superstep, adding roughly a few ms per
+# node; mock-mode runs never use one.
+INVENTORY_CHECKPOINT_BACKEND = os.getenv("INVENTORY_CHECKPOINT_BACKEND", "none").lower()
+INVENTORY_CHECKPOINT_PATH = os.getenv("INVENTORY_CHECKPOINT_PATH", "data/checkpoints.db")
+
+# Fast path: run the nodes as plain sequential calls instead of through the
+# Pregel runtime (no channel writes/reducers per step). Only used when no
+# checkpointer and no LangSmith tracing is in play; the compiled graph stays
+# the canonical path for those.
+INVENTORY_FAST_PATH = os.getenv("INVENTORY_FAST_PATH", "false").lower() in ("1", "true")
+
 
 def build_inventory_workflow() -> StateGraph:
     """
@@ -29,15 +55,14 @@ def build_inventory_workflow() -> StateGraph:
     
     Graph Structure:
     ```
-    START → load_data → calculate_safety → ai_reasoning → route_by_confidence
-                                                              ↓
-                                                    ┌────────┴────────┐
-                                                    ↓                 ↓
-                                              generate_action   generate_action
-                                              (execute)         (pending)
-                                                    ↓                 ↓
-                                                   END               END
+                        ┌→ calculate_safety ────┐
+    START → load_data ──┤                       ├→ ai_reasoning → generate_action → END
+                        └→ prepare_llm_context ─┘
     ```
+    
+    generate_action marks the order "executed" or "pending" (human review)
+    from the recommendation's confidence; load_data and ai_reasoning jump
+    to END on error.
     """
     # Create the graph with state schema
     workflow = StateGraph(InventoryState)
@@ -45,39 +70,19 @@ def build_inventory_workflow() -> StateGraph:
     # Add nodes (Step A, B, C per PS.md)
     workflow.add_node("load_data", data_loader_node)
     workflow.add_node("calculate_safety", safety_calculator_node)
+    workflow.add_node("prepare_llm_context", llm_context_node)
     workflow.add_node("ai_reasoning", reasoning_node)
     workflow.add_node("generate_action", action_generator_node)
     
     # Set entry point
     workflow.set_entry_point("load_data")
     
-    # Add edges (linear flow with error checking)
-    workflow.add_conditional_edges(
-        "load_data",
-        route_on_error,
-        {
-            "continue": "calculate_safety",
-            "error": END
-        }
-    )
-    
-    workflow.add_conditional_edges(
-        "calculate_safety",
-        route_on_error,
-        {
-            "continue": "ai_reasoning",
-            "error": END
-        }
-    )
-    
-    workflow.add_conditional_edges(
-        "ai_reasoning",
-        route_on_error,
-        {
-            "continue": "generate_action",
-            "error": END
-        }
-    )
+    # Add edges. load_data and ai_reasoning route themselves via Command
+    # (fan-out to the parallel branches / next step, or END on error), so
+    # only the join and the final edge are static.
+    # Safety math and LLM context prep both only need inventory_data, so
+    # they run in the same superstep and join before ai_reasoning
+    workflow.add_edge(["calculate_safety", "prepare_llm_context"], "ai_reasoning")
     
     # Final node goes to END
     workflow.add_edge("generate_action", END)
@@ -85,11 +90,61 @@ def build_inventory_workflow() -> StateGraph:
     return workflow
 
 
+# Opened by open_checkpointer() on startup (None: no checkpointing)
+_checkpointer = None
+_checkpointer_stack: Optional[AsyncExitStack] = None
+
+
+async def open_checkpointer():
+    """Open the checkpointer selected by INVENTORY_CHECKPOINT_BACKEND (call on application startup)."""
+    global _checkpointer, _checkpointer_stack
+    
+    if _checkpointer is not None or INVENTORY_CHECKPOINT_BACKEND == "none":
+        return
+    
+    if INVENTORY_CHECKPOINT_BACKEND != "sqlite":
+        logger.warning(f"Unknown INVENTORY_CHECKPOINT_BACKEND '{INVENTORY_CHECKPOINT_BACKEND}', running without checkpoints")
+        return
+    
+    try:
+        from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+    except ImportError:
+        logger.warning("langgraph-checkpoint-sqlite not installed, running without checkpoints")
+        return
+    
+    Path(INVENTORY_CHECKPOINT_PATH).parent.mkdir(parents=True, exist_ok=True)
+    stack = AsyncExitStack()
+    _checkpointer = await stack.enter_async_context(
+        AsyncSqliteSaver.from_conn_string(INVENTORY_CHECKPOINT_PATH)
+    )
+    _checkpointer_stack = stack
+    logger.info(f"Workflow checkpoints stored in {INVENTORY_CHECKPOINT_PATH}")
+
+
+async def close_checkpointer():
+    """Close the checkpointer's connection (call on application shutdown)."""
+    global _checkpointer, _checkpointer_stack
+    
+    if _checkpointer_stack is not None:
+        await _checkpointer_stack.aclose()
+        # Drop the compiled agent bound to the closed checkpointer
+        create_inventory_agent.cache_clear()
+    _checkpointer = None
+    _checkpointer_stack = None
+
+
 # Compile the workflow into a runnable app
-def create_inventory_agent():
+@lru_cache(maxsize=2)
+def create_inventory_agent(checkpointer=None):
     """
     Create a compiled LangGraph agent for inventory analysis.
     
+    The graph is built and compiled once per process (per checkpointer);
+    later calls return the same compiled agent.
+    
+    Args:
+        checkpointer: Optional LangGraph checkpointer for resumable runs
+    
     Usage:
         agent = create_inventory_agent()
         result = agent.invoke({
@@ -100,20 +155,108 @@ def create_inventory_agent():
         })
     """
     workflow = build_inventory_workflow()
-    return workflow.compile()
+    return workflow.compile(checkpointer=checkpointer)
+
 
+def get_agent(mode: str = "mock"):
+    """
+    Return the process-wide compiled agent, compiling it on first use.
+    
+    Mock-mode runs skip checkpointing; other modes use the checkpointer
+    opened by open_checkpointer(), if any.
+    """
+    if mode == "mock":
+        return create_inventory_agent()
+    return create_inventory_agent(_checkpointer)
 
-# Pre-compiled agent instance
-inventory_agent = create_inventory_agent()
 
+# Unchanging part of every run's initial state (copied per run)
+_INITIAL_TEMPLATE: InventoryState = {
+    "product_id": "",
+    "mode": "mock",
+    "request_data": None,
+    "inventory_data": None,
+    "safety_metrics": None,
+    "llm_context": None,
+    "recommendation": None,
+    "action": None,
+    "error": None,
+    "timestamp": "",
+    "trace_id": ""
+}
 
-def run_inventory_analysis(
+
+def _new_state(product_id: str, mode: str, request_data: dict) -> InventoryState:
+    """Build a run's initial state from the template."""
+    state = _INITIAL_TEMPLATE.copy()
+    state["product_id"] = product_id
+    state["mode"] = mode
+    state["request_data"] = request_data
+    state["timestamp"] = datetime.now().isoformat()
+    state["trace_id"] = str(uuid.uuid4())
+    return state
+
+
+# Node order for fast_path (the graph's topological order)
+_FAST_PATH_STEPS = (
+    data_loader_node,
+    safety_calculator_node,
+    llm_context_node,
+    reasoning_node,
+    action_generator_node
+)
+
+
+async def fast_path(
+    product_id: str,
+    mode: str = "mock",
+    request_data: dict = None
+) -> InventoryState:
+    """
+    Run the workflow's nodes directly, without the LangGraph runtime.
+    
+    Produces the same final state as the compiled graph, stopping at the
+    first node that reports an error.
+    
+    Args:
+        product_id: Product to analyze
+        mode: "mock" or "input"
+        request_data: Optional data for input mode
+        
+    Returns:
+        Final state with all results
+    """
+    state = _new_state(product_id, mode, request_data)
+    
+    for step in _FAST_PATH_STEPS:
+        update = step(state)
+        if inspect.isawaitable(update):
+            update = await update
+        if isinstance(update, Command):
+            update = update.update or {}
+        state.update(update)
+        if state["error"]:
+            break
+    
+    return state
+
+
+def _use_fast_path(mode: str) -> bool:
+    """Whether a run can skip the graph (no checkpointing or tracing requested)."""
+    if not INVENTORY_FAST_PATH:
+        return False
+    if os.getenv("LANGCHAIN_TRACING_V2", "false").lower() == "true":
+        return False
+    return mode == "mock" or _checkpointer is None
+
+
+async def arun_inventory_analysis(
     product_id: str,
     mode: str = "mock",
     request_data: dict = None
 ) -> InventoryState:
     """
-    Execute the inventory analysis workflow.
+    Execute the inventory analysis workflow without blocking the event loop.
     
     Args:
         product_id: Product to analyze
@@ -123,18 +266,79 @@ def run_inventory_analysis(
     Returns:
         Final state with all results
     """
-    initial_state: InventoryState = {
-        "product_id": product_id,
-        "mode": mode,
-        "request_data": request_data,
-        "inventory_data": None,
-        "safety_metrics": None,
-        "recommendation": None,
-        "action": None,
-        "error": None,
-        "timestamp": datetime.now().isoformat(),
-        "trace_id": str(uuid.uuid4())
-    }
-    
-    result = inventory_agent.invoke(initial_state)
+    if _use_fast_path(mode):
+        return await fast_path(product_id, mode, request_data)
+    
+    initial_state = _new_state(product_id, mode, request_data)
+    
+    # Checkpoints (if enabled) are stored per run, keyed by trace_id
+    config = {"configurable": {"thread_id": initial_state["trace_id"]}}
+    result = await get_agent(mode).ainvoke(initial_state, config)
     return result
+
+
+def run_inventory_analysis(
+    product_id: str,
+    mode: str = "mock",
+    request_data: dict = None
+) -> InventoryState:
+    """
+    Execute the inventory analysis workflow (blocking, for CLI/scripts).
+    
+    Must not be called from a running event loop; use
+    arun_inventory_analysis there instead.
+    
+    Args:
+        product_id: Product to analyze
+        mode: "mock" or "input"
+        request_data: Optional data for input mode
+        
+    Returns:
+        Final state with all results
+    """
+    return asyncio.run(arun_inventory_analysis(product_id, mode, request_data))
+
+
+async def run_inventory_analyses(
+    product_ids: List[str],
+    mode: str = "mock",
+    request_data: dict = None,
+    max_concurrency: int = 10,
+    timeout: float = 60.0
+) -> List[InventoryState]:
+    """
+    Analyze several products concurrently (at most max_concurrency at a time).
+    
+    Each product's run is independent: a run that raises or exceeds timeout
+    yields a state with "error" set instead of failing the whole batch.
+    
+    Args:
+        product_ids: Products to analyze
+        mode: "mock" or "input"
+        request_data: Optional data for input mode (shared by all products)
+        max_concurrency: Maximum runs in flight (bounds concurrent LLM calls)
+        timeout: Per-product timeout in seconds
+        
+    Returns:
+        Final states, in the same order as product_ids
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+    
+    async def analyze_one(product_id: str) -> InventoryState:
+        async with semaphore:
+            try:
+                return await asyncio.wait_for(
+                    arun_inventory_analysis(product_id, mode, request_data),
+                    timeout=timeout
+                )
+            except asyncio.TimeoutError:
+                error = f"Analysis timed out after {timeout:g}s"
+            except Exception as e:
+                error = f"Analysis failed: {str(e)}"
+            
+            logger.warning(f"{product_id}: {error}")
+            state = _new_state(product_id, mode, request_data)
+            state["error"] = error
+            return state
+    
+    return await asyncio.gather(*(analyze_one(pid) for pid in product_ids))
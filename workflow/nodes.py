@@ -5,9 +5,38 @@ This module defines the state schema and individual node functions
 that make up the agentic workflow per PS.md requirements.
 """
 
-from typing import TypedDict, Optional, List, Dict, Any
+from typing import TypedDict, Optional, List, Dict, Any, Annotated, Literal
 from datetime import datetime
 
+from langgraph.config import get_stream_writer
+from langgraph.graph import END
+from langgraph.types import Command
+
+from agents.data_loader import load_data, load_mock_data
+from agents.safety_calculator import process_inventory_data, summarize_demand
+from agents.reasoning_agent import ReasoningAgent
+from agents.action_agent import generate_action
+from models.schemas import InventoryRequest
+
+
+# ==================== State Reducers ====================
+
+def merge_dicts(
+    current: Optional[Dict[str, Any]],
+    update: Optional[Dict[str, Any]]
+) -> Optional[Dict[str, Any]]:
+    """Merge a node's dict output into the existing value (None leaves it unchanged)."""
+    if update is None:
+        return current
+    if current is None:
+        return update
+    return {**current, **update}
+
+
+def keep_first_error(current: Optional[str], update: Optional[str]) -> Optional[str]:
+    """Keep the earliest error when parallel nodes report failures."""
+    return current if current is not None else update
+
 
 class InventoryState(TypedDict):
     """
@@ -26,8 +55,9 @@ class InventoryState(TypedDict):
     # Step A: Data Retrieval
     inventory_data: Optional[Dict[str, Any]]
     
-    # Safety Calculations
-    safety_metrics: Optional[Dict[str, Any]]
+    # Computed in parallel from inventory_data (merged via reducers)
+    safety_metrics: Annotated[Optional[Dict[str, Any]], merge_dicts]
+    llm_context: Annotated[Optional[Dict[str, Any]], merge_dicts]
     
     # Step B: AI Reasoning
     recommendation: Optional[Dict[str, Any]]
@@ -36,22 +66,47 @@ class InventoryState(TypedDict):
     action: Optional[Dict[str, Any]]
     
     # Metadata
-    error: Optional[str]
+    error: Annotated[Optional[str], keep_first_error]
     timestamp: str
     trace_id: str
 
 
 # ==================== Node Functions ====================
+#
+# Nodes return partial updates (only the keys they set); LangGraph merges
+# them into the state. Nodes that decide where the run goes next return a
+# Command carrying both the update and the next node (END on error).
+
+# Shared across runs so the lazily-created LLM clients (and their
+# connection pools) are reused
+_reasoning_agent: Optional[ReasoningAgent] = None
 
-def data_loader_node(state: InventoryState) -> InventoryState:
+
+def _get_reasoning_agent() -> ReasoningAgent:
+    """Return the process-wide ReasoningAgent, creating it on first use."""
+    global _reasoning_agent
+    if _reasoning_agent is None:
+        _reasoning_agent = ReasoningAgent()
+    return _reasoning_agent
+
+
+def _get_stream_writer():
+    """Return the run's custom stream writer (a no-op outside a graph run)."""
+    try:
+        return get_stream_writer()
+    except RuntimeError:
+        return lambda chunk: None
+
+
+def data_loader_node(
+    state: InventoryState
+) -> Command[Literal["calculate_safety", "prepare_llm_context", "__end__"]]:
     """
     Step A: Query demand forecast from CSV/database.
     
     Per PS.md: "The Agent queries a mock 'Demand Forecast' CSV/Database."
+    On success fans out to the parallel safety/context branches.
     """
-    from agents.data_loader import load_data, load_mock_data
-    from models.schemas import InventoryRequest
-    
     try:
         product_id = state["product_id"]
         mode = state.get("mode", "mock")
@@ -68,30 +123,23 @@ def data_loader_node(state: InventoryState) -> InventoryState:
             )
             inventory_data = load_data(request)
         
-        return {
-            **state,
-            "inventory_data": inventory_data,
-            "error": None
-        }
+        return Command(
+            update={"inventory_data": inventory_data},
+            goto=["calculate_safety", "prepare_llm_context"]
+        )
     except Exception as e:
-        return {
-            **state,
-            "inventory_data": None,
-            "error": f"Data loading failed: {str(e)}"
-        }
+        return Command(update={"error": f"Data loading failed: {str(e)}"}, goto=END)
 
 
-def safety_calculator_node(state: InventoryState) -> InventoryState:
+def safety_calculator_node(state: InventoryState) -> Dict[str, Any]:
     """
     Calculate safety stock, reorder point, and shortage metrics.
     
     This uses statistical formulas (Z-score, standard deviation)
     to determine inventory thresholds.
     """
-    from agents.safety_calculator import process_inventory_data
-    
     if state.get("error"):
-        return state
+        return {}
     
     try:
         inventory_data = state["inventory_data"]
@@ -100,13 +148,15 @@ def safety_calculator_node(state: InventoryState) -> InventoryState:
         service_level = inventory_data.get("service_level", 0.95)
         current_stock = inventory_data["current_stock"]
         
-        avg_demand, std_dev, safety_stock, reorder_point = process_inventory_data(
+        # Plain floats (not NumPy scalars) so the state stays checkpoint-serializable
+        avg_demand, std_dev, safety_stock, reorder_point = map(float, process_inventory_data(
             demand_history=demand_history,
             lead_time=lead_time,
             service_level=service_level
-        )
+        ))
         
         shortage = max(0, reorder_point - current_stock)
+        demand_history_tail, demand_stats = summarize_demand(demand_history)
         
         safety_metrics = {
             "avg_demand": avg_demand,
@@ -115,23 +165,43 @@ def safety_calculator_node(state: InventoryState) -> InventoryState:
             "reorder_point": reorder_point,
             "current_stock": current_stock,
             "shortage": shortage,
-            "needs_restock": shortage > 0
+            "needs_restock": shortage > 0,
+            # Bounded view of the demand series for the LLM prompt
+            "demand_history_tail": demand_history_tail,
+            "demand_stats": demand_stats
         }
         
-        return {
-            **state,
-            "safety_metrics": safety_metrics,
-            "error": None
-        }
+        return {"safety_metrics": safety_metrics}
     except Exception as e:
-        return {
-            **state,
-            "safety_metrics": None,
-            "error": f"Safety calculation failed: {str(e)}"
+        return {"error": f"Safety calculation failed: {str(e)}"}
+
+
+def llm_context_node(state: InventoryState) -> Dict[str, Any]:
+    """
+    Extract the product/warehouse context the AI reasoning step needs.
+    
+    Runs in the same superstep as safety_calculator_node; the reasoning
+    node combines both outputs.
+    """
+    if state.get("error"):
+        return {}
+    
+    try:
+        inventory_data = state["inventory_data"]
+        llm_context = {
+            "product_id": state["product_id"],
+            "warehouse_b_stock": inventory_data.get("warehouse_b_stock", 0),
+            "lead_time_days": inventory_data["lead_time_days"],
+            "unit_price": inventory_data.get("unit_price", 100)
         }
+        return {"llm_context": llm_context}
+    except Exception as e:
+        return {"error": f"Context preparation failed: {str(e)}"}
 
 
-def reasoning_node(state: InventoryState) -> InventoryState:
+async def reasoning_node(
+    state: InventoryState
+) -> Command[Literal["generate_action", "__end__"]]:
     """
     Step B: AI determines if low stock is a crisis or demand is dropping.
     
@@ -139,68 +209,66 @@ def reasoning_node(state: InventoryState) -> InventoryState:
     demand is dropping anyway (avoiding overstock)."
     
     Uses LLM (Gemini/Llama) to analyze context and make recommendation.
-    """
-    from agents.reasoning_agent import ReasoningAgent
+    Async so the LLM round-trip doesn't block the event loop.
+    Ends the run if either parallel branch (or the LLM call) failed.
     
+    The response is streamed: once action/quantity/confidence have arrived
+    they are emitted as a {"partial_recommendation": ...} custom stream event
+    (stream_mode="custom"), so callers can act before the reasoning text
+    finishes. The state only ever receives the complete recommendation.
+    """
     if state.get("error"):
-        return state
+        return Command(goto=END)
     
     try:
-        inventory_data = state["inventory_data"]
         safety_metrics = state["safety_metrics"]
         
-        # Prepare context for AI reasoning
+        # Combine the parallel branches' outputs for AI reasoning
         context = {
-            "product_id": state["product_id"],
+            **state["llm_context"],
             "current_stock": safety_metrics["current_stock"],
             "safety_stock": safety_metrics["safety_stock"],
             "reorder_point": safety_metrics["reorder_point"],
             "shortage": safety_metrics["shortage"],
             "avg_demand": safety_metrics["avg_demand"],
             "std_dev": safety_metrics["std_dev"],
-            "lead_time_days": inventory_data["lead_time_days"],
-            "demand_history": inventory_data["demand_history"],
-            "unit_price": inventory_data.get("unit_price", 100)
+            "demand_history_tail": safety_metrics["demand_history_tail"],
+            "demand_stats": safety_metrics["demand_stats"]
         }
         
-        agent = ReasoningAgent()
-        recommendation = agent.analyze(context)
+        agent = _get_reasoning_agent()
+        write_stream = _get_stream_writer()
+        recommendation = None
+        try:
+            async for result in agent.analyze_stream(context):
+                if result.get("_partial"):
+                    write_stream({"partial_recommendation": result})
+                else:
+                    recommendation = result
+        except RuntimeError:
+            # Every provider failed mid-stream; fall back to the retried call
+            recommendation = await agent.analyze(context)
         
-        return {
-            **state,
-            "recommendation": recommendation,
-            "error": None
-        }
+        return Command(update={"recommendation": recommendation}, goto="generate_action")
     except Exception as e:
-        return {
-            **state,
-            "recommendation": None,
-            "error": f"AI reasoning failed: {str(e)}"
-        }
+        return Command(update={"error": f"AI reasoning failed: {str(e)}"}, goto=END)
 
 
-def action_generator_node(state: InventoryState) -> InventoryState:
+def action_generator_node(state: InventoryState) -> Dict[str, Any]:
     """
     Step C: Generate JSON payload for Purchase Order or Transfer Order.
     
     Per PS.md: "The Agent generates a JSON payload for a Purchase Order
     or suggests moving stock from a different warehouse."
     """
-    from agents.action_agent import generate_action
-    
-    if state.get("error"):
-        return state
-    
     try:
         recommendation = state["recommendation"]
         inventory_data = state["inventory_data"]
         safety_metrics = state["safety_metrics"]
         
         action = generate_action(
-            product_id=state["product_id"],
-            recommended_action=recommendation["action"],
-            quantity=recommendation["quantity"],
-            unit_price=inventory_data.get("unit_price", 100)
+            state["product_id"],
+            {**recommendation, "unit_price": inventory_data.get("unit_price", 100)}
         )
         
         # Enrich action with metadata
@@ -212,41 +280,7 @@ def action_generator_node(state: InventoryState) -> InventoryState:
             "safety_metrics": safety_metrics
         }
         
-        return {
-            **state,
-            "action": action_data,
-            "error": None
-        }
+        return {"action": action_data}
     except Exception as e:
-        return {
-            **state,
-            "action": None,
-            "error": f"Action generation failed: {str(e)}"
-        }
-
-
-# ==================== Routing Functions ====================
-
-def route_on_error(state: InventoryState) -> str:
-    """Route to error handling if any step failed."""
-    if state.get("error"):
-        return "error"
-    return "continue"
+        return {"error": f"Action generation failed: {str(e)}"}
 
-
-def route_by_confidence(state: InventoryState) -> str:
-    """
-    Route based on AI confidence score.
-    
-    - High confidence (≥0.6): Auto-execute
-    - Low confidence (<0.6): Pending for human review
-    """
-    if state.get("error"):
-        return "error"
-    
-    recommendation = state.get("recommendation", {})
-    confidence = recommendation.get("confidence", 0)
-    
-    if confidence >= 0.6:
-        return "execute"
-    return "pending"